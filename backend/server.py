@@ -1,14 +1,28 @@
-from fastapi import FastAPI, APIRouter, HTTPException
+import os
+
+# Motor sizes its executor thread pool from this at import time; the default (5x CPUs) oversubscribes
+os.environ.setdefault("MOTOR_MAX_WORKERS", "10")
+
+from fastapi import FastAPI, APIRouter, Depends, HTTPException, Header, Response
+from fastapi.responses import ORJSONResponse, StreamingResponse
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
 from motor.motor_asyncio import AsyncIOMotorClient
-import os
+from pymongo import ReplaceOne
+from pymongo.errors import OperationFailure
+import orjson
+import hashlib
 import logging
+import time
+import uuid
 from pathlib import Path
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, field_validator
 from typing import List, Optional
 from datetime import datetime
 from emergentintegrations.llm.chat import LlmChat, UserMessage
+from cachetools import TTLCache
+from itertools import combinations
+from functools import lru_cache
 import asyncio
 
 ROOT_DIR = Path(__file__).parent
@@ -16,11 +30,18 @@ load_dotenv(ROOT_DIR / '.env')
 
 # MongoDB connection
 mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
+# Pre-warmed pool with bounded timeouts so a slow or unreachable Mongo fails fast instead of stacking up requests
+client = AsyncIOMotorClient(
+    mongo_url,
+    maxPoolSize=100,
+    minPoolSize=10,
+    serverSelectionTimeoutMS=2000,
+    socketTimeoutMS=2000
+)
 db = client[os.environ['DB_NAME']]
 
-# Create the main app
-app = FastAPI()
+# Create the main app (orjson for every response body)
+app = FastAPI(default_response_class=ORJSONResponse)
 api_router = APIRouter(prefix="/api")
 
 # Configure logging
@@ -38,16 +59,24 @@ class Substance(BaseModel):
     drug_class: str
     common_names: List[str] = []
 
-class Interaction(BaseModel):
-    substance_a: str
-    substance_b: str
-    risk_level: str  # low, moderate, high, avoid
-    mechanism: str
-    notes: str
-
 class CheckRequest(BaseModel):
-    substance_ids: List[str]
+    substance_ids: List[str] = Field(..., min_length=2, max_length=10)
     already_taken: bool = False
+    
+    @field_validator("substance_ids")
+    @classmethod
+    def check_substance_ids(cls, substance_ids: List[str]) -> List[str]:
+        """Drop repeated ids (keeping order) and reject ids outside the substance library"""
+        substance_ids = list(dict.fromkeys(substance_ids))
+        if len(substance_ids) < 2:
+            raise ValueError("Select at least 2 different substances")
+        unknown = [i for i in substance_ids if i not in SUBSTANCES]
+        if unknown:
+            raise ValueError(f"Unknown substance ids: {', '.join(unknown)}")
+        return substance_ids
+
+class CheckBatchRequest(BaseModel):
+    batch: List[CheckRequest] = Field(..., min_length=1, max_length=20)
 
 class CheckResponse(BaseModel):
     risk_level: str
@@ -65,14 +94,9 @@ class Symptom(BaseModel):
 
 # ==================== AI HELPER ====================
 
-async def get_ai_explanation(risk_level: str, mechanism: str, substances: List[str], already_taken: bool) -> str:
-    """Generate harm-reduction explanation using AI"""
-    try:
-        emergent_key = os.environ.get('EMERGENT_LLM_KEY')
-        if not emergent_key:
-            return "Unable to generate explanation at this time."
-        
-        system_prompt = """You are a harm-reduction assistant.
+EMERGENT_LLM_KEY = os.environ.get('EMERGENT_LLM_KEY')
+
+SYSTEM_PROMPT = """You are a harm-reduction assistant.
 You provide non-judgemental, evidence-informed explanations of drug interaction risks.
 You do not calculate risk.
 You do not invent pharmacology.
@@ -82,465 +106,817 @@ You prioritise safety, clarity, and calm language.
 If the user may have already taken substances, focus on monitoring and harm reduction.
 Encourage medical help only when symptoms indicate serious danger, and frame it as support.
 Keep responses to 2-3 sentences maximum."""
-        
-        context = "already taken" if already_taken else "planning to take"
-        substances_str = " and ".join(substances)
-        
-        prompt = f"""Risk level: {risk_level}
+
+PROMPT_TEMPLATE = """Risk level: {risk_level}
 Mechanism: {mechanism}
-Substances: {substances_str}
+Substances: {substances}
 Context: User has {context} these substances.
 
 Provide a brief, calm explanation of this interaction risk in 2-3 sentences."""
-        
-        chat = LlmChat(
-            api_key=emergent_key,
-            session_id="safeuse-harm-reduction",
-            system_message=system_prompt
-        ).with_model("openai", "gpt-4")
-        
-        # Set temperature to 0.3 for consistency
-        user_message = UserMessage(text=prompt)
+
+# Risk levels whose explanation is fixed text; the LLM adds nothing actionable here
+CANNED_EXPLANATIONS = {
+    "unknown": (
+        "There is no documented interaction data for this combination, so its risks can't be described reliably. "
+        "Treat it with extra caution: start with lower doses, space them out, and stay with people you trust."
+    ),
+    "low": (
+        "This combination is generally considered lower risk, but effects can still be intense or unpredictable. "
+        "Start with lower doses, stay hydrated, and have someone you trust nearby."
+    ),
+}
+
+# Fixed text for the remaining levels, used only when no LLM key is configured
+OFFLINE_EXPLANATIONS = {
+    "moderate": (
+        "This combination carries a moderate risk: the effects can add up or interact in ways that are harder to predict. "
+        "If you go ahead, use lower doses, space them out, and stay with people you trust."
+    ),
+    "high": (
+        "This combination carries a high risk because the substances can strain the body in overlapping ways. "
+        "Use much lower doses, avoid redosing, and make sure someone you trust is with you and knows what was taken."
+    ),
+    "avoid": (
+        "This combination is among the most dangerous, with a serious risk of overdose or other medical emergencies. "
+        "If it has already been taken, stay with someone, watch for the symptoms listed below, and get help early if they appear."
+    ),
+}
+
+# Without a key every risk level is canned, so /check never reaches the LLM path at all
+if not EMERGENT_LLM_KEY:
+    logger.warning("EMERGENT_LLM_KEY is not set; using fixed explanations for every risk level")
+    CANNED_EXPLANATIONS.update(OFFLINE_EXPLANATIONS)
+
+# Explanations depend only on their inputs, so they are cached in-process and in Mongo (ai_cache)
+AI_CACHE_TTL = 24 * 3600
+ai_cache = TTLCache(maxsize=4096, ttl=AI_CACHE_TTL)
+ai_inflight = {}  # key -> task generating that explanation
+
+def ai_cache_key(risk_level: str, mechanism: str, substances: List[str], already_taken: bool) -> str:
+    """Stable hash of everything that shapes an explanation"""
+    return hashlib.md5(orjson.dumps([risk_level, mechanism, sorted(substances), already_taken])).hexdigest()
+
+LLM_PROVIDER = "openai"
+LLM_MODEL = "gpt-4"
+LLM_SESSION_ID = "safeuse-harm-reduction"
+LLM_SEM = asyncio.Semaphore(8)  # caps concurrent LLM calls so bursts queue instead of exhausting quota
+
+# LlmChat keeps its session's message history, so each explanation gets a fresh chat;
+# a shared one would grow its context and mix users' substances
+def new_llm_chat() -> LlmChat:
+    """Fresh chat bound to the harm-reduction prompt and model"""
+    return LlmChat(
+        api_key=EMERGENT_LLM_KEY,
+        session_id=LLM_SESSION_ID,
+        system_message=SYSTEM_PROMPT
+    ).with_model(LLM_PROVIDER, LLM_MODEL)
+
+async def generate_ai_explanation(risk_level: str, mechanism: str, substances: List[str], already_taken: bool) -> str:
+    """Ask the LLM for a harm-reduction explanation (raises on failure)"""
+    prompt = PROMPT_TEMPLATE.format(
+        risk_level=risk_level,
+        mechanism=mechanism,
+        substances=" and ".join(substances),
+        context="already taken" if already_taken else "planning to take"
+    )
+    
+    # Set temperature to 0.3 for consistency
+    user_message = UserMessage(text=prompt)
+    chat = new_llm_chat()
+    async with LLM_SEM:
         response = await chat.send_message(user_message)
+    
+    return response.strip()
+
+async def fetch_ai_explanation(key: str, risk_level: str, mechanism: str, substances: List[str], already_taken: bool) -> str:
+    """Explanation from the Mongo cache or, failing that, the LLM; stored in both caches"""
+    # The Mongo cache is best-effort: if it is slow or down, the LLM still answers and the result stays in-process
+    try:
+        cached = await db.ai_cache.find_one({"_id": key}, {"explanation": 1, "_id": 0})
+    except Exception as e:
+        logger.error(f"AI cache read error: {e}")
+        cached = None
+    
+    if cached:
+        explanation = cached["explanation"]
+    else:
+        explanation = await generate_ai_explanation(risk_level, mechanism, substances, already_taken)
+        try:
+            await db.ai_cache.update_one(
+                {"_id": key},
+                {"$set": {"explanation": explanation, "created_at": datetime.utcnow()}},
+                upsert=True
+            )
+        except Exception as e:
+            logger.error(f"AI cache write error: {e}")
+    
+    ai_cache[key] = explanation
+    return explanation
+
+async def get_ai_explanation(risk_level: str, mechanism: str, substances: List[str], already_taken: bool) -> str:
+    """Generate harm-reduction explanation using AI, reusing cached explanations"""
+    try:
+        key = ai_cache_key(risk_level, mechanism, substances, already_taken)
+        explanation = ai_cache.get(key)
+        if explanation is not None:
+            return explanation
         
-        return response.strip()
+        # Concurrent misses for the same key share one lookup/LLM call; shield keeps it
+        # running for the others if the request that started it is cancelled
+        task = ai_inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(
+                fetch_ai_explanation(key, risk_level, mechanism, substances, already_taken)
+            )
+            ai_inflight[key] = task
+            task.add_done_callback(lambda _: ai_inflight.pop(key, None))
+        return await asyncio.shield(task)
     except Exception as e:
         logger.error(f"AI explanation error: {e}")
         return "This combination may pose risks. Please review the harm-reduction advice below."
 
 # ==================== RISK CALCULATION ENGINE ====================
 
+RISK_COLORS = {
+    "low": "#10B981",  # green
+    "moderate": "#F59E0B",  # yellow/orange
+    "high": "#EF4444",  # red
+    "avoid": "#991B1B",  # dark red
+    "unknown": "#6B7280"  # gray
+}
+
+# Ordered least to most severe; an interaction's risk_rank is its 1-based position here
+RISK_LEVELS = ("low", "moderate", "high", "avoid")
+RISK_RANKS = {level: rank for rank, level in enumerate(RISK_LEVELS, start=1)}
+
 def get_risk_color(risk_level: str) -> str:
     """Map risk level to color"""
-    colors = {
-        "low": "#10B981",  # green
-        "moderate": "#F59E0B",  # yellow/orange
-        "high": "#EF4444",  # red
-        "avoid": "#991B1B",  # dark red
-        "unknown": "#6B7280"  # gray
-    }
-    return colors.get(risk_level.lower(), "#6B7280")
-
-async def calculate_interaction_risk(substance_ids: List[str]) -> dict:
-    """Deterministic risk calculation from database"""
-    if len(substance_ids) < 2:
-        # Get substance names even for single substance
-        substances = await db.substances.find(
-            {"id": {"$in": substance_ids}},
-            {"name": 1, "_id": 0}
-        ).to_list(100)
-        substance_names = [s["name"] for s in substances]
-        
-        return {
-            "risk_level": "unknown",
-            "mechanism": "Insufficient substances selected",
-            "notes": "Please select at least 2 substances to check interactions.",
-            "substances": substance_names
-        }
-    
-    # Get all substances (optimized with projection)
-    substances = await db.substances.find(
-        {"id": {"$in": substance_ids}},
-        {"name": 1, "_id": 0}
-    ).to_list(100)
-    substance_names = [s["name"] for s in substances]
-    
-    # Check pairwise interactions
-    max_risk = "low"
-    mechanisms = []
-    notes = []
+    return RISK_COLORS.get(risk_level, RISK_COLORS["unknown"])
+
+def pair_key(a: str, b: str) -> tuple:
+    """Order-independent key for a substance pair"""
+    return (a, b) if a <= b else (b, a)
+
+@lru_cache(maxsize=4096)
+def assess_interactions(substance_ids: tuple) -> tuple:
+    """(risk_level, mechanism, notes) for a sorted tuple of ids; cleared whenever the lookups reload"""
+    # Check pairwise interactions: one hashed lookup per pair
+    pairs = (pair_key(a, b) for a, b in combinations(substance_ids, 2))
+    hits = [risk for risk in map(PAIR_INDEX.get, pairs) if risk]
     
-    risk_hierarchy = {"low": 1, "moderate": 2, "high": 3, "avoid": 4}
+    if not hits:
+        return (
+            "unknown",
+            "No interaction data available for this combination",
+            "This combination has not been studied or documented. Exercise extreme caution."
+        )
     
-    for i in range(len(substance_ids)):
-        for j in range(i + 1, len(substance_ids)):
-            # Check both directions
-            interaction = await db.interactions.find_one({
-                "$or": [
-                    {"substance_a": substance_ids[i], "substance_b": substance_ids[j]},
-                    {"substance_a": substance_ids[j], "substance_b": substance_ids[i]}
-                ]
-            })
-            
-            if interaction:
-                current_risk = interaction["risk_level"].lower()
-                if risk_hierarchy.get(current_risk, 0) > risk_hierarchy.get(max_risk, 0):
-                    max_risk = current_risk
-                mechanisms.append(interaction["mechanism"])
-                notes.append(interaction["notes"])
+    # Integer max over the precomputed ranks, floored at "low"
+    max_rank = max(rank for rank, _, _ in hits)
+    max_risk = RISK_LEVELS[max(max_rank, RISK_RANKS["low"]) - 1]
+    # Pairs often share text (e.g. "Respiratory depression"), so repeats are dropped, keeping order
+    mechanisms = dict.fromkeys(mechanism for _, mechanism, _ in hits)
+    notes = dict.fromkeys(note for _, _, note in hits)
     
-    if not mechanisms:
-        return {
-            "risk_level": "unknown",
-            "mechanism": "No interaction data available for this combination",
-            "notes": "This combination has not been studied or documented. Exercise extreme caution.",
-            "substances": substance_names
-        }
+    return (max_risk, "; ".join(mechanisms), " ".join(notes))
+
+def calculate_interaction_risk(substance_ids: List[str]) -> dict:
+    """Deterministic risk calculation from the in-memory lookup tables"""
+    substance_names = [SUBSTANCES[i]["name"] for i in substance_ids if i in SUBSTANCES]
     
+    # Order-independent, so repeat checks of the same selection hit the cache
+    risk_level, mechanism, notes = assess_interactions(tuple(sorted(substance_ids)))
     return {
-        "risk_level": max_risk,
-        "mechanism": "; ".join(mechanisms),
-        "notes": " ".join(notes),
+        "risk_level": risk_level,
+        "mechanism": mechanism,
+        "notes": notes,
         "substances": substance_names
     }
 
+# ==================== IN-MEMORY LOOKUPS ====================
+
+# The whole seeded dataset is tiny and only changes through /seed-data, so every read is served from RAM
+PAIR_INDEX = {}  # sorted (substance_a, substance_b) -> (risk_rank, mechanism, notes)
+SUBSTANCES = {}  # id -> substance
+HARM_ADVICE_BY_CONTEXT = {}  # "planning" / "already_taken" -> advice, including "both"
+EMERGENCY_SYMPTOMS = []  # serious/emergency symptoms shown for high/avoid risk
+EMERGENCY_SYMPTOMS_JSON = orjson.Fragment(b"[]")  # the same list, serialized once and spliced into responses
+LIST_RESPONSES = {}  # "substances" / "symptoms" -> (JSON body, ETag)
+
+# Each Uvicorn worker holds its own tables, so /seed-data records a version in Mongo (meta.seed)
+# and every worker reloads when it sees a new one
+SEED_VERSION_CHECK_INTERVAL = 5  # seconds between a worker's checks for a newer seed
+lookup_state = {"version": None, "checked_at": 0.0, "sync_task": None}
+lookup_reload_lock = asyncio.Lock()
+
+async def get_seed_version() -> Optional[str]:
+    """Version written by the last /seed-data, if any"""
+    doc = await db.meta.find_one({"_id": "seed"}, {"version": 1})
+    return doc["version"] if doc else None
+
+async def load_lookup_tables():
+    """(Re)build every in-memory table from Mongo"""
+    global EMERGENCY_SYMPTOMS_JSON
+    # Read before the data: a seed landing mid-load then shows up as a newer version on the next check
+    version = await get_seed_version()
+    rows, substances, advice, symptoms = await asyncio.gather(
+        db.interactions.find(
+            {},
+            {"substance_a": 1, "substance_b": 1, "risk_level": 1, "risk_rank": 1, "mechanism": 1, "notes": 1, "_id": 0}
+        ).to_list(None),
+        db.substances.find(
+            {},
+            {"id": 1, "name": 1, "drug_class": 1, "common_names": 1, "_id": 0}
+        ).to_list(None),
+        db.harm_advice.find({}, {"context": 1, "advice": 1, "_id": 0}).to_list(None),
+        db.symptoms.find(
+            {},
+            {"name": 1, "severity": 1, "description": 1, "action": 1, "_id": 0}
+        ).to_list(None)
+    )
+    # Rows from older seeds may be stored unsorted, so every pair is keyed through pair_key; the first row wins
+    # if one is repeated. Those rows also predate risk_rank and lowercase levels, so they fall back to the level name
+    pair_index = {}
+    for row in rows:
+        pair_index.setdefault(
+            pair_key(row["substance_a"], row["substance_b"]),
+            (
+                row.get("risk_rank") or RISK_RANKS.get(row["risk_level"].lower(), 0),
+                row["mechanism"],
+                row["notes"]
+            )
+        )
+    
+    # No awaits from here on, so requests never see a half-swapped set of tables
+    PAIR_INDEX.clear()
+    PAIR_INDEX.update(pair_index)
+    SUBSTANCES.clear()
+    SUBSTANCES.update((s["id"], s) for s in substances)
+    HARM_ADVICE_BY_CONTEXT.clear()
+    HARM_ADVICE_BY_CONTEXT.update(
+        (context, tuple(a["advice"] for a in advice if a["context"] in (context, "both")))
+        for context in ("planning", "already_taken")
+    )
+    EMERGENCY_SYMPTOMS[:] = [
+        {"name": s["name"], "description": s["description"], "action": s["action"]}
+        for s in symptoms
+        if s["severity"] in ("serious", "emergency")
+    ]
+    EMERGENCY_SYMPTOMS_JSON = orjson.Fragment(orjson.dumps(EMERGENCY_SYMPTOMS))
+    # The projections match Substance/Symptom, so docs are served as-is without per-request validation
+    LIST_RESPONSES["substances"] = serialize_with_etag(substances)
+    LIST_RESPONSES["symptoms"] = serialize_with_etag(symptoms)
+    assess_interactions.cache_clear()
+    lookup_state["version"] = version
+    lookup_state["checked_at"] = time.monotonic()
+
+def lookup_tables_fresh() -> bool:
+    """Tables are loaded and were checked against the seed version recently"""
+    return bool(SUBSTANCES) and time.monotonic() - lookup_state["checked_at"] < SEED_VERSION_CHECK_INTERVAL
+
+async def sync_lookup_tables():
+    """Reload this worker's tables if another worker re-seeded or they were never loaded"""
+    async with lookup_reload_lock:
+        # Another caller may have refreshed the tables while this one waited
+        if lookup_tables_fresh():
+            return
+        try:
+            if not SUBSTANCES or await get_seed_version() != lookup_state["version"]:
+                await load_lookup_tables()
+        except Exception as e:
+            # Keep serving the tables already loaded; the next check retries
+            logger.error(f"Lookup table refresh error: {e}")
+        lookup_state["checked_at"] = time.monotonic()
+
+async def refresh_lookup_tables():
+    """Route dependency: serve loaded tables immediately, syncing them in the background when due"""
+    if SUBSTANCES:
+        # The version check touches Mongo, so it never holds up a request that already has tables
+        if not lookup_tables_fresh():
+            task = lookup_state["sync_task"]
+            if task is None or task.done():
+                lookup_state["sync_task"] = asyncio.ensure_future(sync_lookup_tables())
+        return
+    # Nothing to serve yet (e.g. another worker just seeded a fresh database): load before answering
+    await sync_lookup_tables()
+
+# ==================== SEED DATA ====================
+
+def normalize_interactions(interactions: List[dict]) -> List[dict]:
+    """Store each pair in sorted order with a lowercase risk_level and its risk_rank, keeping only the first entry per pair"""
+    seen_pairs = set()
+    normalized = []
+    for interaction in interactions:
+        a, b = pair_key(interaction["substance_a"], interaction["substance_b"])
+        if (a, b) in seen_pairs:
+            continue
+        seen_pairs.add((a, b))
+        risk_level = interaction["risk_level"].lower()
+        normalized.append({
+            **interaction,
+            "substance_a": a,
+            "substance_b": b,
+            "risk_level": risk_level,
+            "risk_rank": RISK_RANKS[risk_level]
+        })
+    return normalized
+
+# Comprehensive substance library
+SEED_SUBSTANCES = [
+    # Stimulants
+    {"id": "mdma", "name": "MDMA", "drug_class": "stimulant-empathogen", "common_names": ["Ecstasy", "Molly", "E", "X"]},
+    {"id": "cocaine", "name": "Cocaine", "drug_class": "stimulant", "common_names": ["Coke", "Blow", "Snow"]},
+    {"id": "amphetamine", "name": "Amphetamine", "drug_class": "stimulant", "common_names": ["Speed", "Adderall", "Dexedrine"]},
+    {"id": "methamphetamine", "name": "Methamphetamine", "drug_class": "stimulant", "common_names": ["Meth", "Crystal", "Ice", "Tina"]},
+    {"id": "caffeine", "name": "Caffeine", "drug_class": "stimulant", "common_names": ["Coffee", "Energy drinks"]},
+    {"id": "methylphenidate", "name": "Methylphenidate", "drug_class": "stimulant", "common_names": ["Ritalin", "Concerta"]},
+
+    # Depressants
+    {"id": "alcohol", "name": "Alcohol", "drug_class": "depressant", "common_names": ["Booze", "Liquor", "Beer", "Wine"]},
+    {"id": "benzos", "name": "Benzodiazepines", "drug_class": "depressant", "common_names": ["Xanax", "Valium", "Klonopin", "Ativan"]},
+    {"id": "opioids", "name": "Opioids", "drug_class": "depressant", "common_names": ["Heroin", "Fentanyl", "Oxy", "Morphine"]},
+    {"id": "ghb", "name": "GHB/GBL", "drug_class": "depressant", "common_names": ["G", "Liquid Ecstasy", "Gina"]},
+    {"id": "barbiturates", "name": "Barbiturates", "drug_class": "depressant", "common_names": ["Phenobarbital", "Seconal"]},
+    {"id": "zolpidem", "name": "Zolpidem", "drug_class": "depressant", "common_names": ["Ambien", "Stilnox"]},
+
+    # Psychedelics
+    {"id": "lsd", "name": "LSD", "drug_class": "psychedelic", "common_names": ["Acid", "Lucy", "Tabs"]},
+    {"id": "mushrooms", "name": "Psilocybin", "drug_class": "psychedelic", "common_names": ["Shrooms", "Magic Mushrooms"]},
+    {"id": "dmt", "name": "DMT", "drug_class": "psychedelic", "common_names": ["Dimitri", "Spirit Molecule"]},
+    {"id": "mescaline", "name": "Mescaline", "drug_class": "psychedelic", "common_names": ["Peyote", "San Pedro"]},
+    {"id": "2cb", "name": "2C-B", "drug_class": "psychedelic", "common_names": ["Nexus", "Bees"]},
+    {"id": "ayahuasca", "name": "Ayahuasca", "drug_class": "psychedelic", "common_names": ["Aya", "Yagé"]},
+
+    # Dissociatives
+    {"id": "ketamine", "name": "Ketamine", "drug_class": "dissociative", "common_names": ["K", "Special K", "Ket"]},
+    {"id": "dxm", "name": "DXM", "drug_class": "dissociative", "common_names": ["Dextromethorphan", "Robitussin", "Dex"]},
+    {"id": "pcp", "name": "PCP", "drug_class": "dissociative", "common_names": ["Angel Dust", "Sherm"]},
+    {"id": "nitrous", "name": "Nitrous Oxide", "drug_class": "dissociative", "common_names": ["Laughing Gas", "Nos", "Whippits"]},
+
+    # Cannabinoids
+    {"id": "cannabis", "name": "Cannabis", "drug_class": "cannabinoid", "common_names": ["Weed", "Marijuana", "THC", "Pot"]},
+    {"id": "synthetic_cannabinoids", "name": "Synthetic Cannabinoids", "drug_class": "cannabinoid", "common_names": ["Spice", "K2"]},
+
+    # Antidepressants
+    {"id": "ssri", "name": "SSRIs", "drug_class": "antidepressant", "common_names": ["Prozac", "Zoloft", "Lexapro"]},
+    {"id": "maoi", "name": "MAOIs", "drug_class": "antidepressant", "common_names": ["Nardil", "Parnate"]},
+    {"id": "tricyclic", "name": "Tricyclic Antidepressants", "drug_class": "antidepressant", "common_names": ["Amitriptyline", "Imipramine"]},
+
+    # Other
+    {"id": "tramadol", "name": "Tramadol", "drug_class": "opioid-like", "common_names": ["Ultram", "Tramal"]},
+    {"id": "pregabalin", "name": "Pregabalin", "drug_class": "gabapentinoid", "common_names": ["Lyrica"]},
+    {"id": "gabapentin", "name": "Gabapentin", "drug_class": "gabapentinoid", "common_names": ["Neurontin"]},
+    {"id": "dph", "name": "Diphenhydramine", "drug_class": "deliriant", "common_names": ["Benadryl", "DPH"]},
+    {"id": "poppers", "name": "Alkyl Nitrites", "drug_class": "vasodilator", "common_names": ["Poppers", "Rush"]},
+    {"id": "kratom", "name": "Kratom", "drug_class": "opioid-like", "common_names": ["Mitragyna speciosa"]},
+]
+
+# Comprehensive interaction data (the literal repeats some pairs; normalized once at import)
+SEED_INTERACTIONS = normalize_interactions([
+    # ===== AVOID (LIFE-THREATENING) =====
+    {"substance_a": "alcohol", "substance_b": "benzos", "risk_level": "avoid", "mechanism": "Both are CNS depressants causing severe respiratory depression", "notes": "Significantly increases risk of overdose, loss of consciousness, and death."},
+    {"substance_a": "alcohol", "substance_b": "opioids", "risk_level": "avoid", "mechanism": "Synergistic respiratory depression", "notes": "Extremely dangerous - can lead to fatal overdose."},
+    {"substance_a": "alcohol", "substance_b": "ghb", "risk_level": "avoid", "mechanism": "Severe CNS depression and respiratory failure", "notes": "Very high risk of unconsciousness, respiratory arrest, and death."},
+    {"substance_a": "benzos", "substance_b": "opioids", "risk_level": "avoid", "mechanism": "Compounding respiratory depression", "notes": "Leading cause of overdose deaths. Extremely dangerous."},
+    {"substance_a": "benzos", "substance_b": "ghb", "risk_level": "avoid", "mechanism": "Severe sedation and respiratory depression", "notes": "High risk of coma and death."},
+    {"substance_a": "opioids", "substance_b": "ghb", "risk_level": "avoid", "mechanism": "Extreme respiratory depression", "notes": "Life-threatening combination."},
+    {"substance_a": "maoi", "substance_b": "mdma", "risk_level": "avoid", "mechanism": "Risk of serotonin syndrome", "notes": "Can cause dangerously high body temperature, seizures, and death."},
+    {"substance_a": "maoi", "substance_b": "ssri", "risk_level": "avoid", "mechanism": "Severe serotonin syndrome", "notes": "Medical emergency - can be fatal."},
+    {"substance_a": "maoi", "substance_b": "amphetamine", "risk_level": "avoid", "mechanism": "Hypertensive crisis", "notes": "Dangerously elevated blood pressure."},
+    {"substance_a": "maoi", "substance_b": "cocaine", "risk_level": "avoid", "mechanism": "Severe hypertensive crisis", "notes": "Risk of stroke and cardiovascular emergency."},
+    {"substance_a": "maoi", "substance_b": "dxm", "risk_level": "avoid", "mechanism": "Serotonin syndrome", "notes": "Potentially fatal interaction."},
+    {"substance_a": "tramadol", "substance_b": "ssri", "risk_level": "avoid", "mechanism": "Serotonin syndrome risk", "notes": "Can cause seizures and serotonin toxicity."},
+    {"substance_a": "tramadol", "substance_b": "maoi", "risk_level": "avoid", "mechanism": "Severe serotonin syndrome", "notes": "Life-threatening interaction."},
+
+    # ===== HIGH RISK =====
+    {"substance_a": "mdma", "substance_b": "alcohol", "risk_level": "high", "mechanism": "Increased dehydration and masked intoxication", "notes": "MDMA masks alcohol effects leading to dangerous overconsumption."},
+    {"substance_a": "mdma", "substance_b": "cocaine", "risk_level": "high", "mechanism": "Cardiovascular strain and neurotoxicity", "notes": "Both significantly increase heart rate and blood pressure."},
+    {"substance_a": "mdma", "substance_b": "amphetamine", "risk_level": "high", "mechanism": "Increased neurotoxicity and overheating risk", "notes": "Risk of serotonin syndrome and hyperthermia."},
+    {"substance_a": "mdma", "substance_b": "methamphetamine", "risk_level": "high", "mechanism": "Extreme cardiovascular stress and neurotoxicity", "notes": "Dangerous strain on heart and brain."},
+    {"substance_a": "cocaine", "substance_b": "alcohol", "risk_level": "high", "mechanism": "Forms cocaethylene - increased cardiac toxicity", "notes": "Cocaethylene is more toxic than cocaine alone."},
+    {"substance_a": "cocaine", "substance_b": "amphetamine", "risk_level": "high", "mechanism": "Excessive cardiovascular strain", "notes": "Risk of heart attack and stroke."},
+    {"substance_a": "cocaine", "substance_b": "mdma", "risk_level": "high", "mechanism": "Compounding stimulant effects", "notes": "Extreme heart and blood pressure elevation."},
+    {"substance_a": "ketamine", "substance_b": "alcohol", "risk_level": "high", "mechanism": "Risk of vomiting while unconscious", "notes": "High risk of aspiration and respiratory depression."},
+    {"substance_a": "ketamine", "substance_b": "benzos", "risk_level": "high", "mechanism": "Excessive sedation and respiratory depression", "notes": "Dangerous combination increasing blackout risk."},
+    {"substance_a": "ketamine", "substance_b": "opioids", "risk_level": "high", "mechanism": "Respiratory depression", "notes": "Risk of unconsciousness and breathing problems."},
+    {"substance_a": "dxm", "substance_b": "alcohol", "risk_level": "high", "mechanism": "CNS depression and nausea", "notes": "Increased risk of vomiting and respiratory issues."},
+    {"substance_a": "pcp", "substance_b": "alcohol", "risk_level": "high", "mechanism": "Unpredictable effects and respiratory depression", "notes": "Dangerous combination with erratic behavior risk."},
+    {"substance_a": "synthetic_cannabinoids", "substance_b": "alcohol", "risk_level": "high", "mechanism": "Unpredictable interactions", "notes": "Synthetic cannabinoids have unpredictable effects."},
+    {"substance_a": "mdma", "substance_b": "ssri", "risk_level": "high", "mechanism": "SSRIs reduce MDMA effects but increase neurotoxicity risk", "notes": "May feel underwhelming but brain impact remains."},
+    {"substance_a": "tramadol", "substance_b": "alcohol", "risk_level": "high", "mechanism": "Respiratory depression and seizure risk", "notes": "Dangerous combination."},
+    {"substance_a": "tramadol", "substance_b": "benzos", "risk_level": "high", "mechanism": "Respiratory depression", "notes": "Significant overdose risk."},
+    {"substance_a": "amphetamine", "substance_b": "alcohol", "risk_level": "high", "mechanism": "Masked intoxication", "notes": "Stimulants mask alcohol effects leading to overconsumption."},
+    {"substance_a": "methamphetamine", "substance_b": "alcohol", "risk_level": "high", "mechanism": "Masked intoxication and liver stress", "notes": "Dangerous overconsumption risk."},
+
+    # Based on TripSit - additional dangerous/high risk
+    {"substance_a": "tramadol", "substance_b": "amphetamine", "risk_level": "avoid", "mechanism": "Both increase seizure risk significantly", "notes": "Tramadol and stimulants both lower seizure threshold."},
+    {"substance_a": "tramadol", "substance_b": "cocaine", "risk_level": "avoid", "mechanism": "Both increase seizure risk significantly", "notes": "Tramadol and stimulants both lower seizure threshold."},
+    {"substance_a": "tramadol", "substance_b": "mdma", "risk_level": "avoid", "mechanism": "Both increase seizure risk significantly", "notes": "Tramadol and stimulants both lower seizure threshold."},
+    {"substance_a": "dxm", "substance_b": "ssri", "risk_level": "avoid", "mechanism": "High risk of serotonin syndrome", "notes": "Can be fatal. SSRIs strongly potentiate DXM."},
+    {"substance_a": "dxm", "substance_b": "maoi", "risk_level": "avoid", "mechanism": "Severe serotonin syndrome", "notes": "Potentially fatal - avoid completely."},
+    {"substance_a": "cocaine", "substance_b": "opioids", "risk_level": "avoid", "mechanism": "Stimulants can mask respiratory depression from opioids", "notes": "When cocaine wears off, dangerous opioid concentration remains."},
+
+    # ===== MODERATE RISK =====
+    # Cannabis combinations
+    {"substance_a": "cannabis", "substance_b": "alcohol", "risk_level": "moderate", "mechanism": "Enhanced intoxication and nausea", "notes": "Can cause 'greening out' - severe nausea and dizziness."},
+    {"substance_a": "lsd", "substance_b": "cannabis", "risk_level": "moderate", "mechanism": "Intensified psychedelic effects", "notes": "May increase anxiety and confusion - start with low doses."},
+    {"substance_a": "mushrooms", "substance_b": "cannabis", "risk_level": "moderate", "mechanism": "Intensified psychedelic effects", "notes": "Can increase thought loops and anxiety."},
+    {"substance_a": "cannabis", "substance_b": "ketamine", "risk_level": "moderate", "mechanism": "Intensified dissociation", "notes": "Can be disorienting and increase nausea."},
+
+    # Psychedelic combinations  
+    {"substance_a": "lsd", "substance_b": "mushrooms", "risk_level": "moderate", "mechanism": "Cross-tolerance and intensified effects", "notes": "Psychologically intense but not physically dangerous."},
+    {"substance_a": "lsd", "substance_b": "alcohol", "risk_level": "moderate", "mechanism": "Dulled psychedelic experience and nausea", "notes": "Alcohol reduces trip quality."},
+    {"substance_a": "mushrooms", "substance_b": "alcohol", "risk_level": "moderate", "mechanism": "Reduced trip quality and increased nausea", "notes": "Generally not recommended but not highly dangerous."},
+    {"substance_a": "lsd", "substance_b": "nitrous", "risk_level": "moderate", "mechanism": "Intensely enhanced psychedelic effects", "notes": "Very intense but brief. Risk of falling - sit down."},
+    {"substance_a": "mushrooms", "substance_b": "nitrous", "risk_level": "moderate", "mechanism": "Intensely enhanced psychedelic effects", "notes": "Powerful but brief synergy."},
+    {"substance_a": "mdma", "substance_b": "2cb", "risk_level": "moderate", "mechanism": "Combined stimulant and psychedelic effects", "notes": "Intense experience with cardiovascular considerations."},
+
+    # Dissociative combinations
+    {"substance_a": "ketamine", "substance_b": "nitrous", "risk_level": "moderate", "mechanism": "Profound dissociation", "notes": "Risk of complete dissociation - sit or lie down."},
+    {"substance_a": "dxm", "substance_b": "cannabis", "risk_level": "moderate", "mechanism": "Intensified dissociation and confusion", "notes": "Can increase anxiety and nausea."},
+    {"substance_a": "nitrous", "substance_b": "alcohol", "risk_level": "moderate", "mechanism": "Increased sedation and ataxia", "notes": "Can lead to vomiting and blackouts."},
+
+    # Stimulant combinations
+    {"substance_a": "caffeine", "substance_b": "alcohol", "risk_level": "moderate", "mechanism": "Masked intoxication", "notes": "Caffeine can mask alcohol effects leading to overconsumption."},
+    {"substance_a": "caffeine", "substance_b": "mdma", "risk_level": "moderate", "mechanism": "Increased cardiovascular strain", "notes": "Adds to heart rate and anxiety."},
+    {"substance_a": "mdma", "substance_b": "cannabis", "risk_level": "moderate", "mechanism": "Cannabis can increase anxiety during comedown", "notes": "Some find helpful, others find anxiety-inducing."},
+    {"substance_a": "amphetamine", "substance_b": "cannabis", "risk_level": "moderate", "mechanism": "Cannabis can increase stimulant-induced anxiety", "notes": "Effects vary by individual."},
+
+    # Gabapentinoid combinations
+    {"substance_a": "pregabalin", "substance_b": "alcohol", "risk_level": "moderate", "mechanism": "Enhanced sedation", "notes": "Increased risk of respiratory depression."},
+    {"substance_a": "gabapentin", "substance_b": "alcohol", "risk_level": "moderate", "mechanism": "Enhanced sedation", "notes": "Increased intoxication and blackout risk."},
+
+    # ===== LOW RISK =====
+    {"substance_a": "cannabis", "substance_b": "alcohol", "risk_level": "moderate", "mechanism": "Enhanced intoxication and nausea", "notes": "Can cause 'greening out' - severe nausea and dizziness."},
+    {"substance_a": "lsd", "substance_b": "cannabis", "risk_level": "moderate", "mechanism": "Intensified psychedelic effects", "notes": "May increase anxiety and confusion."},
+    {"substance_a": "mushrooms", "substance_b": "cannabis", "risk_level": "moderate", "mechanism": "Intensified psychedelic effects", "notes": "Can increase thought loops and anxiety."},
+    {"substance_a": "lsd", "substance_b": "mushrooms", "risk_level": "moderate", "mechanism": "Cross-tolerance and intensified effects", "notes": "Psychologically intense but not physically dangerous."},
+    {"substance_a": "lsd", "substance_b": "alcohol", "risk_level": "moderate", "mechanism": "Dulled psychedelic experience", "notes": "Alcohol can reduce trip intensity and increase nausea."},
+    {"substance_a": "mushrooms", "substance_b": "alcohol", "risk_level": "moderate", "mechanism": "Reduced trip quality and increased nausea", "notes": "Generally not recommended but not highly dangerous."},
+    {"substance_a": "mdma", "substance_b": "cannabis", "risk_level": "moderate", "mechanism": "Cannabis can increase anxiety during comedown", "notes": "Some find it helpful, others find it anxiety-inducing."},
+    {"substance_a": "ketamine", "substance_b": "cannabis", "risk_level": "moderate", "mechanism": "Intensified dissociation", "notes": "Can be disorienting and increase nausea."},
+    {"substance_a": "nitrous", "substance_b": "cannabis", "risk_level": "moderate", "mechanism": "Enhanced dissociation", "notes": "Can be disorienting - use while seated."},
+    {"substance_a": "lsd", "substance_b": "nitrous", "risk_level": "moderate", "mechanism": "Intensely enhanced psychedelic effects", "notes": "Very intense but brief. Risk of falling."},
+    {"substance_a": "mushrooms", "substance_b": "nitrous", "risk_level": "moderate", "mechanism": "Intensely enhanced psychedelic effects", "notes": "Powerful but brief synergy."},
+    {"substance_a": "mdma", "substance_b": "2cb", "risk_level": "moderate", "mechanism": "Combined stimulant and psychedelic effects", "notes": "Intense experience with cardiovascular considerations."},
+    {"substance_a": "lsd", "substance_b": "2cb", "risk_level": "moderate", "mechanism": "Cross-tolerance and intensified visuals", "notes": "Psychologically intense."},
+    {"substance_a": "ketamine", "substance_b": "nitrous", "risk_level": "moderate", "mechanism": "Profound dissociation", "notes": "Risk of complete dissociation - sit or lie down."},
+    {"substance_a": "dxm", "substance_b": "cannabis", "risk_level": "moderate", "mechanism": "Intensified dissociation and confusion", "notes": "Can increase anxiety and nausea."},
+    {"substance_a": "caffeine", "substance_b": "alcohol", "risk_level": "moderate", "mechanism": "Masked intoxication", "notes": "Caffeine can mask alcohol effects leading to overconsumption."},
+    {"substance_a": "caffeine", "substance_b": "mdma", "risk_level": "moderate", "mechanism": "Increased cardiovascular strain", "notes": "Adds to heart rate and anxiety."},
+    {"substance_a": "pregabalin", "substance_b": "alcohol", "risk_level": "moderate", "mechanism": "Enhanced sedation", "notes": "Increased risk of respiratory depression."},
+    {"substance_a": "gabapentin", "substance_b": "alcohol", "risk_level": "moderate", "mechanism": "Enhanced sedation", "notes": "Increased intoxication and blackout risk."},
+    {"substance_a": "dph", "substance_b": "alcohol", "risk_level": "moderate", "mechanism": "Enhanced sedation and confusion", "notes": "Uncomfortable combination."},
+
+    # ===== LOW RISK =====
+    # Psychedelic + dissociative (generally safe, intense experiences)
+    {"substance_a": "lsd", "substance_b": "ketamine", "risk_level": "low", "mechanism": "Minimal dangerous interaction", "notes": "Psychologically intense but not physically dangerous. Can be very disorienting."},
+    {"substance_a": "mushrooms", "substance_b": "ketamine", "risk_level": "low", "mechanism": "Minimal dangerous interaction", "notes": "Intense dissociative psychedelic experience."},
+    {"substance_a": "lsd", "substance_b": "dmt", "risk_level": "low", "mechanism": "Cross-tolerance", "notes": "DMT experience may be less intense if LSD already active."},
+    {"substance_a": "mushrooms", "substance_b": "dmt", "risk_level": "low", "mechanism": "Cross-tolerance", "notes": "Both tryptamines - some cross-tolerance."},
+
+    # Popular combinations (candy/hippy flips)
+    {"substance_a": "lsd", "substance_b": "mdma", "risk_level": "low", "mechanism": "Enhanced empathogenic and psychedelic effects", "notes": "Popular 'candyflip' combination. Stay hydrated."},
+    {"substance_a": "mushrooms", "substance_b": "mdma", "risk_level": "low", "mechanism": "Enhanced effects", "notes": "Intense 'hippy flip' experience. Stay hydrated."},
+
+    # Psychedelic + nitrous
+    {"substance_a": "mdma", "substance_b": "nitrous", "risk_level": "low", "mechanism": "Brief enhanced effects", "notes": "Popular combination but very brief."},
+    {"substance_a": "dmt", "substance_b": "nitrous", "risk_level": "low", "mechanism": "Intensely synergistic", "notes": "Extremely intense but brief."},
+
+    # Cannabis combinations (generally low risk)
+    {"substance_a": "cannabis", "substance_b": "caffeine", "risk_level": "low", "mechanism": "Minimal interaction", "notes": "Generally safe but may increase anxiety in some."},
+    {"substance_a": "kratom", "substance_b": "cannabis", "risk_level": "low", "mechanism": "Minimal interaction", "notes": "Generally well tolerated combination."},
+
+    # Benzodiazepines reducing psychedelic effects
+    {"substance_a": "lsd", "substance_b": "benzos", "risk_level": "low", "mechanism": "Benzos reduce psychedelic effects", "notes": "Benzos commonly used to end difficult trips."},
+    {"substance_a": "mushrooms", "substance_b": "benzos", "risk_level": "low", "mechanism": "Benzos reduce psychedelic effects", "notes": "Can help manage anxiety during trips."},
+
+    # Cross-tolerances (psychedelics)
+    {"substance_a": "lsd", "substance_b": "mescaline", "risk_level": "low", "mechanism": "Cross-tolerance", "notes": "Both psychedelics - significant tolerance overlap."},
+    {"substance_a": "lsd", "substance_b": "2cb", "risk_level": "low", "mechanism": "Intensified visuals", "notes": "Psychologically intense but physically safe."},
+
+    # SSRI interactions (reduces effects)
+    {"substance_a": "lsd", "substance_b": "ssri", "risk_level": "low", "mechanism": "SSRIs reduce psychedelic effects", "notes": "SSRIs significantly dampen LSD effects."},
+    {"substance_a": "mushrooms", "substance_b": "ssri", "risk_level": "low", "mechanism": "SSRIs reduce psychedelic effects", "notes": "SSRIs block psilocybin effects."},
+    {"substance_a": "dmt", "substance_b": "ssri", "risk_level": "low", "mechanism": "SSRIs may reduce effects", "notes": "SSRIs can dampen DMT experience."},
+])
+
+# Harm reduction advice
+SEED_HARM_ADVICE = [
+    {"context": "both", "advice": "Stay hydrated with water, but don't overdo it - sip regularly."},
+    {"context": "both", "advice": "Avoid mixing with additional substances."},
+    {"context": "both", "advice": "Stay with trusted people who can help if needed."},
+    {"context": "both", "advice": "Start with lower doses when combining substances."},
+    {"context": "planning", "advice": "Test your substances if possible using a test kit."},
+    {"context": "planning", "advice": "Plan for a safe environment and have emergency contacts ready."},
+    {"context": "already_taken", "advice": "Avoid redosing - wait to see the full effects."},
+    {"context": "already_taken", "advice": "Monitor your breathing and heart rate."},
+    {"context": "already_taken", "advice": "Find a cool, comfortable place to rest if feeling overwhelmed."}
+]
+
+# Emergency symptoms
+SEED_SYMPTOMS = [
+    {
+        "name": "Chest pain or pressure",
+        "severity": "emergency",
+        "description": "Severe chest pain, tightness, or pressure",
+        "action": "Seek immediate medical attention"
+    },
+    {
+        "name": "Difficulty breathing",
+        "severity": "emergency",
+        "description": "Struggling to breathe, gasping, or very slow breathing",
+        "action": "Call emergency services immediately"
+    },
+    {
+        "name": "Loss of consciousness",
+        "severity": "emergency",
+        "description": "Unable to wake person or keep them awake",
+        "action": "Call emergency services and place in recovery position"
+    },
+    {
+        "name": "Seizures",
+        "severity": "emergency",
+        "description": "Uncontrolled shaking or convulsions",
+        "action": "Protect from injury and call emergency services"
+    },
+    {
+        "name": "Severe confusion or agitation",
+        "severity": "serious",
+        "description": "Extreme confusion, paranoia, or aggressive behavior",
+        "action": "Move to calm environment; seek medical help if worsening"
+    },
+    {
+        "name": "Overheating",
+        "severity": "serious",
+        "description": "Very hot skin, confusion, rapid heartbeat",
+        "action": "Cool down immediately with water and air; seek medical attention"
+    },
+    {
+        "name": "Severe nausea or vomiting",
+        "severity": "monitor",
+        "description": "Persistent vomiting or inability to keep fluids down",
+        "action": "Rest, sip water slowly; seek help if continues for hours"
+    }
+]
+
+# ==================== HTTP CACHING ====================
+
+# Seed-backed lists are shared and near-static; /check results are per-user but stable for a while
+LIST_CACHE_CONTROL = "public, max-age=3600, stale-while-revalidate=86400"
+CHECK_CACHE_CONTROL = "private, max-age=300, stale-while-revalidate=3600"
+
+def serialize_with_etag(payload) -> tuple:
+    """JSON body and strong ETag for a payload, computed once per cache fill"""
+    body = orjson.dumps(payload)
+    return body, '"' + hashlib.md5(body).hexdigest() + '"'
+
+def etag_matches(etag: str, if_none_match: Optional[str]) -> bool:
+    """Whether an If-None-Match header already names this ETag (weak comparison, RFC 9110)"""
+    if not if_none_match:
+        return False
+    # Proxies that compress the body (e.g. the nginx ingress) weaken the tag to W/"...", and clients echo that form
+    tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return "*" in tags or etag.removeprefix("W/") in tags
+
+def conditional_response(body: bytes, etag: str, if_none_match: Optional[str]) -> Response:
+    """304 when the client holds the current body, else the pre-serialized body tagged with its ETag"""
+    headers = {"ETag": etag, "Cache-Control": LIST_CACHE_CONTROL}
+    if etag_matches(etag, if_none_match):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
 # ==================== API ROUTES ====================
 
 @api_router.get("/")
 async def root():
-    return {"message": "SAFEUSE API - Harm Reduction Drug Interaction Checker"}
+    return ORJSONResponse(content={"message": "SAFEUSE API - Harm Reduction Drug Interaction Checker"})
 
-@api_router.get("/substances", response_model=List[Substance])
-async def get_substances():
+@api_router.get(
+    "/substances",
+    dependencies=[Depends(refresh_lookup_tables)],
+    responses={200: {"model": List[Substance]}}
+)
+async def get_substances(if_none_match: Optional[str] = Header(None, alias="If-None-Match")):
     """Get all available substances"""
-    substances = await db.substances.find(
-        {},
-        {"id": 1, "name": 1, "drug_class": 1, "common_names": 1, "_id": 0}
-    ).to_list(1000)
-    return [Substance(**s) for s in substances]
+    body, etag = LIST_RESPONSES["substances"]
+    return conditional_response(body, etag, if_none_match)
+
+def build_check_result(request: CheckRequest) -> tuple:
+    """Deterministic part of a check: (response fields other than the explanation, mechanism)"""
+    # Step 1: Calculate risk deterministically
+    risk_data = calculate_interaction_risk(request.substance_ids)
+    risk_level = risk_data["risk_level"]
+    
+    high_risk = risk_level in ["high", "avoid"]
+    context = "already_taken" if request.already_taken else "planning"
+    
+    # Step 2: Harm-reduction advice plus risk-specific advice (a fresh list per request)
+    harm_advice = list(HARM_ADVICE_BY_CONTEXT.get(context, ()))
+    if high_risk:
+        if request.already_taken:
+            harm_advice.insert(0, "Monitor your symptoms closely and stay with someone who can help if needed.")
+        else:
+            harm_advice.insert(0, "Consider avoiding this combination to reduce risk.")
+    
+    # Step 3: Emergency symptoms if high risk
+    emergency_symptoms = EMERGENCY_SYMPTOMS_JSON if high_risk else None
+    
+    result = {
+        "risk_level": risk_level,
+        "risk_color": get_risk_color(risk_level),
+        "harm_advice": harm_advice,
+        "emergency_symptoms": emergency_symptoms,
+        "substances": risk_data["substances"]
+    }
+    return result, risk_data["mechanism"]
+
+async def explain_check(result: dict, mechanism: str, already_taken: bool) -> str:
+    """AI explanation of a computed result (AI does NOT decide risk; skipped when the text is canned)"""
+    risk_level = result["risk_level"]
+    if risk_level in CANNED_EXPLANATIONS:
+        return CANNED_EXPLANATIONS[risk_level]
+    return await get_ai_explanation(risk_level, mechanism, result["substances"], already_taken)
 
-@api_router.post("/check", response_model=CheckResponse)
+@api_router.post(
+    "/check",
+    dependencies=[Depends(refresh_lookup_tables)],
+    responses={200: {"model": CheckResponse}}
+)
 async def check_interaction(request: CheckRequest):
     """Check drug interaction - DETERMINISTIC risk calculation + AI explanation"""
     try:
-        # Step 1: Calculate risk deterministically
-        risk_data = await calculate_interaction_risk(request.substance_ids)
-        risk_level = risk_data["risk_level"]
-        mechanism = risk_data["mechanism"]
-        substances = risk_data["substances"]
-        
-        # Step 2: Get AI explanation (AI does NOT decide risk)
-        explanation = await get_ai_explanation(
-            risk_level,
-            mechanism,
-            substances,
-            request.already_taken
-        )
-        
-        # Step 3: Get harm-reduction advice (optimized with projection)
-        context = "already_taken" if request.already_taken else "planning"
-        advice_docs = await db.harm_advice.find(
-            {"context": {"$in": [context, "both"]}},
-            {"advice": 1, "_id": 0}
-        ).to_list(100)
+        result, mechanism = build_check_result(request)
+        explanation = await explain_check(result, mechanism, request.already_taken)
         
-        harm_advice = [doc["advice"] for doc in advice_docs]
-        
-        # Add risk-specific advice
-        if risk_level in ["high", "avoid"]:
-            if request.already_taken:
-                harm_advice.insert(0, "Monitor your symptoms closely and stay with someone who can help if needed.")
-            else:
-                harm_advice.insert(0, "Consider avoiding this combination to reduce risk.")
-        
-        # Step 4: Get emergency symptoms if high risk (optimized with projection)
-        emergency_symptoms = None
-        if risk_level in ["high", "avoid"]:
-            symptoms = await db.symptoms.find(
-                {"severity": {"$in": ["serious", "emergency"]}},
-                {"name": 1, "description": 1, "action": 1, "_id": 0}
-            ).to_list(50)
-            emergency_symptoms = [
-                {
-                    "name": s["name"],
-                    "description": s["description"],
-                    "action": s["action"]
-                }
-                for s in symptoms
-            ]
-        
-        return CheckResponse(
-            risk_level=risk_level,
-            risk_color=get_risk_color(risk_level),
-            explanation=explanation,
-            harm_advice=harm_advice,
-            emergency_symptoms=emergency_symptoms,
-            substances=substances
-        )
+        # Documented as CheckResponse; returned as an ORJSONResponse so the result skips validation and
+        # jsonable_encoder, and orjson splices the pre-serialized symptoms in as-is
+        result["explanation"] = explanation
+        return ORJSONResponse(content=result, headers={"Cache-Control": CHECK_CACHE_CONTROL})
     except Exception as e:
         logger.error(f"Check interaction error: {e}")
         raise HTTPException(status_code=500, detail="Unable to check interaction")
 
-@api_router.get("/symptoms", response_model=List[Symptom])
-async def get_symptoms():
+@api_router.post("/check/stream", dependencies=[Depends(refresh_lookup_tables)])
+async def check_interaction_stream(request: CheckRequest):
+    """Same as /check as NDJSON: the deterministic result line first, then an explanation line"""
+    try:
+        result, mechanism = build_check_result(request)
+    except Exception as e:
+        logger.error(f"Check interaction error: {e}")
+        raise HTTPException(status_code=500, detail="Unable to check interaction")
+    
+    # LlmChat exposes no token stream, so the explanation arrives as one line once it is ready;
+    # clients can render risk, advice and symptoms without waiting on the LLM
+    async def lines():
+        yield orjson.dumps(result) + b"\n"
+        explanation = await explain_check(result, mechanism, request.already_taken)
+        yield orjson.dumps({"explanation": explanation}) + b"\n"
+    
+    return StreamingResponse(
+        lines(),
+        media_type="application/x-ndjson",
+        headers={"Cache-Control": CHECK_CACHE_CONTROL}
+    )
+
+@api_router.post(
+    "/check/batch",
+    dependencies=[Depends(refresh_lookup_tables)],
+    responses={200: {"model": List[CheckResponse]}}
+)
+async def check_interaction_batch(request: CheckBatchRequest):
+    """Run several checks in one call; results are /check bodies in request order"""
+    try:
+        built = [build_check_result(check) for check in request.batch]
+        # Explanations for the whole batch are fetched concurrently (and share the AI caches)
+        explanations = await asyncio.gather(*(
+            explain_check(result, mechanism, check.already_taken)
+            for (result, mechanism), check in zip(built, request.batch)
+        ))
+        
+        results = []
+        for (result, _), explanation in zip(built, explanations):
+            result["explanation"] = explanation
+            results.append(result)
+        return ORJSONResponse(content=results, headers={"Cache-Control": CHECK_CACHE_CONTROL})
+    except Exception as e:
+        logger.error(f"Check interaction batch error: {e}")
+        raise HTTPException(status_code=500, detail="Unable to check interactions")
+
+@api_router.get(
+    "/symptoms",
+    dependencies=[Depends(refresh_lookup_tables)],
+    responses={200: {"model": List[Symptom]}}
+)
+async def get_symptoms(if_none_match: Optional[str] = Header(None, alias="If-None-Match")):
     """Get symptom guidance"""
-    symptoms = await db.symptoms.find().to_list(100)
-    return [Symptom(**s) for s in symptoms]
+    body, etag = LIST_RESPONSES["symptoms"]
+    return conditional_response(body, etag, if_none_match)
+
+async def seed_collection(collection, docs: List[dict], key_fields: tuple):
+    """Prune rows earlier seeds left behind (duplicates, removed or reworded entries), then upsert by natural key"""
+    seed_keys = {tuple(d[f] for f in key_fields) for d in docs}
+    kept_keys = set()
+    stale_ids = []
+    async for row in collection.find({}, {f: 1 for f in key_fields}):
+        key = tuple(row.get(f) for f in key_fields)
+        if key in seed_keys and key not in kept_keys:
+            kept_keys.add(key)
+        else:
+            stale_ids.append(row["_id"])
+    if stale_ids:
+        await collection.delete_many({"_id": {"$in": stale_ids}})
+    
+    await collection.bulk_write(
+        [ReplaceOne({f: d[f] for f in key_fields}, d, upsert=True) for d in docs],
+        ordered=False
+    )
 
 @api_router.post("/seed-data")
 async def seed_database():
-    """Seed database with comprehensive substance library"""
+    """Seed database with comprehensive substance library (idempotent upserts)"""
     try:
-        # Clear existing data
-        await db.substances.delete_many({})
-        await db.interactions.delete_many({})
-        await db.harm_advice.delete_many({})
-        await db.symptoms.delete_many({})
-        
-        # Comprehensive substance library
-        substances = [
-            # Stimulants
-            {"id": "mdma", "name": "MDMA", "drug_class": "stimulant-empathogen", "common_names": ["Ecstasy", "Molly", "E", "X"]},
-            {"id": "cocaine", "name": "Cocaine", "drug_class": "stimulant", "common_names": ["Coke", "Blow", "Snow"]},
-            {"id": "amphetamine", "name": "Amphetamine", "drug_class": "stimulant", "common_names": ["Speed", "Adderall", "Dexedrine"]},
-            {"id": "methamphetamine", "name": "Methamphetamine", "drug_class": "stimulant", "common_names": ["Meth", "Crystal", "Ice", "Tina"]},
-            {"id": "caffeine", "name": "Caffeine", "drug_class": "stimulant", "common_names": ["Coffee", "Energy drinks"]},
-            {"id": "methylphenidate", "name": "Methylphenidate", "drug_class": "stimulant", "common_names": ["Ritalin", "Concerta"]},
-            
-            # Depressants
-            {"id": "alcohol", "name": "Alcohol", "drug_class": "depressant", "common_names": ["Booze", "Liquor", "Beer", "Wine"]},
-            {"id": "benzos", "name": "Benzodiazepines", "drug_class": "depressant", "common_names": ["Xanax", "Valium", "Klonopin", "Ativan"]},
-            {"id": "opioids", "name": "Opioids", "drug_class": "depressant", "common_names": ["Heroin", "Fentanyl", "Oxy", "Morphine"]},
-            {"id": "ghb", "name": "GHB/GBL", "drug_class": "depressant", "common_names": ["G", "Liquid Ecstasy", "Gina"]},
-            {"id": "barbiturates", "name": "Barbiturates", "drug_class": "depressant", "common_names": ["Phenobarbital", "Seconal"]},
-            {"id": "zolpidem", "name": "Zolpidem", "drug_class": "depressant", "common_names": ["Ambien", "Stilnox"]},
-            
-            # Psychedelics
-            {"id": "lsd", "name": "LSD", "drug_class": "psychedelic", "common_names": ["Acid", "Lucy", "Tabs"]},
-            {"id": "mushrooms", "name": "Psilocybin", "drug_class": "psychedelic", "common_names": ["Shrooms", "Magic Mushrooms"]},
-            {"id": "dmt", "name": "DMT", "drug_class": "psychedelic", "common_names": ["Dimitri", "Spirit Molecule"]},
-            {"id": "mescaline", "name": "Mescaline", "drug_class": "psychedelic", "common_names": ["Peyote", "San Pedro"]},
-            {"id": "2cb", "name": "2C-B", "drug_class": "psychedelic", "common_names": ["Nexus", "Bees"]},
-            {"id": "ayahuasca", "name": "Ayahuasca", "drug_class": "psychedelic", "common_names": ["Aya", "Yagé"]},
-            
-            # Dissociatives
-            {"id": "ketamine", "name": "Ketamine", "drug_class": "dissociative", "common_names": ["K", "Special K", "Ket"]},
-            {"id": "dxm", "name": "DXM", "drug_class": "dissociative", "common_names": ["Dextromethorphan", "Robitussin", "Dex"]},
-            {"id": "pcp", "name": "PCP", "drug_class": "dissociative", "common_names": ["Angel Dust", "Sherm"]},
-            {"id": "nitrous", "name": "Nitrous Oxide", "drug_class": "dissociative", "common_names": ["Laughing Gas", "Nos", "Whippits"]},
-            
-            # Cannabinoids
-            {"id": "cannabis", "name": "Cannabis", "drug_class": "cannabinoid", "common_names": ["Weed", "Marijuana", "THC", "Pot"]},
-            {"id": "synthetic_cannabinoids", "name": "Synthetic Cannabinoids", "drug_class": "cannabinoid", "common_names": ["Spice", "K2"]},
-            
-            # Antidepressants
-            {"id": "ssri", "name": "SSRIs", "drug_class": "antidepressant", "common_names": ["Prozac", "Zoloft", "Lexapro"]},
-            {"id": "maoi", "name": "MAOIs", "drug_class": "antidepressant", "common_names": ["Nardil", "Parnate"]},
-            {"id": "tricyclic", "name": "Tricyclic Antidepressants", "drug_class": "antidepressant", "common_names": ["Amitriptyline", "Imipramine"]},
-            
-            # Other
-            {"id": "tramadol", "name": "Tramadol", "drug_class": "opioid-like", "common_names": ["Ultram", "Tramal"]},
-            {"id": "pregabalin", "name": "Pregabalin", "drug_class": "gabapentinoid", "common_names": ["Lyrica"]},
-            {"id": "gabapentin", "name": "Gabapentin", "drug_class": "gabapentinoid", "common_names": ["Neurontin"]},
-            {"id": "dph", "name": "Diphenhydramine", "drug_class": "deliriant", "common_names": ["Benadryl", "DPH"]},
-            {"id": "poppers", "name": "Alkyl Nitrites", "drug_class": "vasodilator", "common_names": ["Poppers", "Rush"]},
-            {"id": "kratom", "name": "Kratom", "drug_class": "opioid-like", "common_names": ["Mitragyna speciosa"]},
-        ]
-        await db.substances.insert_many(substances)
-        
-        # Comprehensive interaction data
-        interactions = [
-            # ===== AVOID (LIFE-THREATENING) =====
-            {"substance_a": "alcohol", "substance_b": "benzos", "risk_level": "avoid", "mechanism": "Both are CNS depressants causing severe respiratory depression", "notes": "Significantly increases risk of overdose, loss of consciousness, and death."},
-            {"substance_a": "alcohol", "substance_b": "opioids", "risk_level": "avoid", "mechanism": "Synergistic respiratory depression", "notes": "Extremely dangerous - can lead to fatal overdose."},
-            {"substance_a": "alcohol", "substance_b": "ghb", "risk_level": "avoid", "mechanism": "Severe CNS depression and respiratory failure", "notes": "Very high risk of unconsciousness, respiratory arrest, and death."},
-            {"substance_a": "benzos", "substance_b": "opioids", "risk_level": "avoid", "mechanism": "Compounding respiratory depression", "notes": "Leading cause of overdose deaths. Extremely dangerous."},
-            {"substance_a": "benzos", "substance_b": "ghb", "risk_level": "avoid", "mechanism": "Severe sedation and respiratory depression", "notes": "High risk of coma and death."},
-            {"substance_a": "opioids", "substance_b": "ghb", "risk_level": "avoid", "mechanism": "Extreme respiratory depression", "notes": "Life-threatening combination."},
-            {"substance_a": "maoi", "substance_b": "mdma", "risk_level": "avoid", "mechanism": "Risk of serotonin syndrome", "notes": "Can cause dangerously high body temperature, seizures, and death."},
-            {"substance_a": "maoi", "substance_b": "ssri", "risk_level": "avoid", "mechanism": "Severe serotonin syndrome", "notes": "Medical emergency - can be fatal."},
-            {"substance_a": "maoi", "substance_b": "amphetamine", "risk_level": "avoid", "mechanism": "Hypertensive crisis", "notes": "Dangerously elevated blood pressure."},
-            {"substance_a": "maoi", "substance_b": "cocaine", "risk_level": "avoid", "mechanism": "Severe hypertensive crisis", "notes": "Risk of stroke and cardiovascular emergency."},
-            {"substance_a": "maoi", "substance_b": "dxm", "risk_level": "avoid", "mechanism": "Serotonin syndrome", "notes": "Potentially fatal interaction."},
-            {"substance_a": "tramadol", "substance_b": "ssri", "risk_level": "avoid", "mechanism": "Serotonin syndrome risk", "notes": "Can cause seizures and serotonin toxicity."},
-            {"substance_a": "tramadol", "substance_b": "maoi", "risk_level": "avoid", "mechanism": "Severe serotonin syndrome", "notes": "Life-threatening interaction."},
-            
-            # ===== HIGH RISK =====
-            {"substance_a": "mdma", "substance_b": "alcohol", "risk_level": "high", "mechanism": "Increased dehydration and masked intoxication", "notes": "MDMA masks alcohol effects leading to dangerous overconsumption."},
-            {"substance_a": "mdma", "substance_b": "cocaine", "risk_level": "high", "mechanism": "Cardiovascular strain and neurotoxicity", "notes": "Both significantly increase heart rate and blood pressure."},
-            {"substance_a": "mdma", "substance_b": "amphetamine", "risk_level": "high", "mechanism": "Increased neurotoxicity and overheating risk", "notes": "Risk of serotonin syndrome and hyperthermia."},
-            {"substance_a": "mdma", "substance_b": "methamphetamine", "risk_level": "high", "mechanism": "Extreme cardiovascular stress and neurotoxicity", "notes": "Dangerous strain on heart and brain."},
-            {"substance_a": "cocaine", "substance_b": "alcohol", "risk_level": "high", "mechanism": "Forms cocaethylene - increased cardiac toxicity", "notes": "Cocaethylene is more toxic than cocaine alone."},
-            {"substance_a": "cocaine", "substance_b": "amphetamine", "risk_level": "high", "mechanism": "Excessive cardiovascular strain", "notes": "Risk of heart attack and stroke."},
-            {"substance_a": "cocaine", "substance_b": "mdma", "risk_level": "high", "mechanism": "Compounding stimulant effects", "notes": "Extreme heart and blood pressure elevation."},
-            {"substance_a": "ketamine", "substance_b": "alcohol", "risk_level": "high", "mechanism": "Risk of vomiting while unconscious", "notes": "High risk of aspiration and respiratory depression."},
-            {"substance_a": "ketamine", "substance_b": "benzos", "risk_level": "high", "mechanism": "Excessive sedation and respiratory depression", "notes": "Dangerous combination increasing blackout risk."},
-            {"substance_a": "ketamine", "substance_b": "opioids", "risk_level": "high", "mechanism": "Respiratory depression", "notes": "Risk of unconsciousness and breathing problems."},
-            {"substance_a": "dxm", "substance_b": "alcohol", "risk_level": "high", "mechanism": "CNS depression and nausea", "notes": "Increased risk of vomiting and respiratory issues."},
-            {"substance_a": "pcp", "substance_b": "alcohol", "risk_level": "high", "mechanism": "Unpredictable effects and respiratory depression", "notes": "Dangerous combination with erratic behavior risk."},
-            {"substance_a": "synthetic_cannabinoids", "substance_b": "alcohol", "risk_level": "high", "mechanism": "Unpredictable interactions", "notes": "Synthetic cannabinoids have unpredictable effects."},
-            {"substance_a": "mdma", "substance_b": "ssri", "risk_level": "high", "mechanism": "SSRIs reduce MDMA effects but increase neurotoxicity risk", "notes": "May feel underwhelming but brain impact remains."},
-            {"substance_a": "tramadol", "substance_b": "alcohol", "risk_level": "high", "mechanism": "Respiratory depression and seizure risk", "notes": "Dangerous combination."},
-            {"substance_a": "tramadol", "substance_b": "benzos", "risk_level": "high", "mechanism": "Respiratory depression", "notes": "Significant overdose risk."},
-            {"substance_a": "amphetamine", "substance_b": "alcohol", "risk_level": "high", "mechanism": "Masked intoxication", "notes": "Stimulants mask alcohol effects leading to overconsumption."},
-            {"substance_a": "methamphetamine", "substance_b": "alcohol", "risk_level": "high", "mechanism": "Masked intoxication and liver stress", "notes": "Dangerous overconsumption risk."},
-            
-            # Based on TripSit - additional dangerous/high risk
-            {"substance_a": "tramadol", "substance_b": "amphetamine", "risk_level": "avoid", "mechanism": "Both increase seizure risk significantly", "notes": "Tramadol and stimulants both lower seizure threshold."},
-            {"substance_a": "tramadol", "substance_b": "cocaine", "risk_level": "avoid", "mechanism": "Both increase seizure risk significantly", "notes": "Tramadol and stimulants both lower seizure threshold."},
-            {"substance_a": "tramadol", "substance_b": "mdma", "risk_level": "avoid", "mechanism": "Both increase seizure risk significantly", "notes": "Tramadol and stimulants both lower seizure threshold."},
-            {"substance_a": "dxm", "substance_b": "ssri", "risk_level": "avoid", "mechanism": "High risk of serotonin syndrome", "notes": "Can be fatal. SSRIs strongly potentiate DXM."},
-            {"substance_a": "dxm", "substance_b": "maoi", "risk_level": "avoid", "mechanism": "Severe serotonin syndrome", "notes": "Potentially fatal - avoid completely."},
-            {"substance_a": "cocaine", "substance_b": "opioids", "risk_level": "avoid", "mechanism": "Stimulants can mask respiratory depression from opioids", "notes": "When cocaine wears off, dangerous opioid concentration remains."},
-            
-            # ===== MODERATE RISK =====
-            # Cannabis combinations
-            {"substance_a": "cannabis", "substance_b": "alcohol", "risk_level": "moderate", "mechanism": "Enhanced intoxication and nausea", "notes": "Can cause 'greening out' - severe nausea and dizziness."},
-            {"substance_a": "lsd", "substance_b": "cannabis", "risk_level": "moderate", "mechanism": "Intensified psychedelic effects", "notes": "May increase anxiety and confusion - start with low doses."},
-            {"substance_a": "mushrooms", "substance_b": "cannabis", "risk_level": "moderate", "mechanism": "Intensified psychedelic effects", "notes": "Can increase thought loops and anxiety."},
-            {"substance_a": "cannabis", "substance_b": "ketamine", "risk_level": "moderate", "mechanism": "Intensified dissociation", "notes": "Can be disorienting and increase nausea."},
-            
-            # Psychedelic combinations  
-            {"substance_a": "lsd", "substance_b": "mushrooms", "risk_level": "moderate", "mechanism": "Cross-tolerance and intensified effects", "notes": "Psychologically intense but not physically dangerous."},
-            {"substance_a": "lsd", "substance_b": "alcohol", "risk_level": "moderate", "mechanism": "Dulled psychedelic experience and nausea", "notes": "Alcohol reduces trip quality."},
-            {"substance_a": "mushrooms", "substance_b": "alcohol", "risk_level": "moderate", "mechanism": "Reduced trip quality and increased nausea", "notes": "Generally not recommended but not highly dangerous."},
-            {"substance_a": "lsd", "substance_b": "nitrous", "risk_level": "moderate", "mechanism": "Intensely enhanced psychedelic effects", "notes": "Very intense but brief. Risk of falling - sit down."},
-            {"substance_a": "mushrooms", "substance_b": "nitrous", "risk_level": "moderate", "mechanism": "Intensely enhanced psychedelic effects", "notes": "Powerful but brief synergy."},
-            {"substance_a": "mdma", "substance_b": "2cb", "risk_level": "moderate", "mechanism": "Combined stimulant and psychedelic effects", "notes": "Intense experience with cardiovascular considerations."},
-            
-            # Dissociative combinations
-            {"substance_a": "ketamine", "substance_b": "nitrous", "risk_level": "moderate", "mechanism": "Profound dissociation", "notes": "Risk of complete dissociation - sit or lie down."},
-            {"substance_a": "dxm", "substance_b": "cannabis", "risk_level": "moderate", "mechanism": "Intensified dissociation and confusion", "notes": "Can increase anxiety and nausea."},
-            {"substance_a": "nitrous", "substance_b": "alcohol", "risk_level": "moderate", "mechanism": "Increased sedation and ataxia", "notes": "Can lead to vomiting and blackouts."},
-            
-            # Stimulant combinations
-            {"substance_a": "caffeine", "substance_b": "alcohol", "risk_level": "moderate", "mechanism": "Masked intoxication", "notes": "Caffeine can mask alcohol effects leading to overconsumption."},
-            {"substance_a": "caffeine", "substance_b": "mdma", "risk_level": "moderate", "mechanism": "Increased cardiovascular strain", "notes": "Adds to heart rate and anxiety."},
-            {"substance_a": "mdma", "substance_b": "cannabis", "risk_level": "moderate", "mechanism": "Cannabis can increase anxiety during comedown", "notes": "Some find helpful, others find anxiety-inducing."},
-            {"substance_a": "amphetamine", "substance_b": "cannabis", "risk_level": "moderate", "mechanism": "Cannabis can increase stimulant-induced anxiety", "notes": "Effects vary by individual."},
-            
-            # Gabapentinoid combinations
-            {"substance_a": "pregabalin", "substance_b": "alcohol", "risk_level": "moderate", "mechanism": "Enhanced sedation", "notes": "Increased risk of respiratory depression."},
-            {"substance_a": "gabapentin", "substance_b": "alcohol", "risk_level": "moderate", "mechanism": "Enhanced sedation", "notes": "Increased intoxication and blackout risk."},
-            
-            # ===== LOW RISK =====
-            {"substance_a": "cannabis", "substance_b": "alcohol", "risk_level": "moderate", "mechanism": "Enhanced intoxication and nausea", "notes": "Can cause 'greening out' - severe nausea and dizziness."},
-            {"substance_a": "lsd", "substance_b": "cannabis", "risk_level": "moderate", "mechanism": "Intensified psychedelic effects", "notes": "May increase anxiety and confusion."},
-            {"substance_a": "mushrooms", "substance_b": "cannabis", "risk_level": "moderate", "mechanism": "Intensified psychedelic effects", "notes": "Can increase thought loops and anxiety."},
-            {"substance_a": "lsd", "substance_b": "mushrooms", "risk_level": "moderate", "mechanism": "Cross-tolerance and intensified effects", "notes": "Psychologically intense but not physically dangerous."},
-            {"substance_a": "lsd", "substance_b": "alcohol", "risk_level": "moderate", "mechanism": "Dulled psychedelic experience", "notes": "Alcohol can reduce trip intensity and increase nausea."},
-            {"substance_a": "mushrooms", "substance_b": "alcohol", "risk_level": "moderate", "mechanism": "Reduced trip quality and increased nausea", "notes": "Generally not recommended but not highly dangerous."},
-            {"substance_a": "mdma", "substance_b": "cannabis", "risk_level": "moderate", "mechanism": "Cannabis can increase anxiety during comedown", "notes": "Some find it helpful, others find it anxiety-inducing."},
-            {"substance_a": "ketamine", "substance_b": "cannabis", "risk_level": "moderate", "mechanism": "Intensified dissociation", "notes": "Can be disorienting and increase nausea."},
-            {"substance_a": "nitrous", "substance_b": "cannabis", "risk_level": "moderate", "mechanism": "Enhanced dissociation", "notes": "Can be disorienting - use while seated."},
-            {"substance_a": "lsd", "substance_b": "nitrous", "risk_level": "moderate", "mechanism": "Intensely enhanced psychedelic effects", "notes": "Very intense but brief. Risk of falling."},
-            {"substance_a": "mushrooms", "substance_b": "nitrous", "risk_level": "moderate", "mechanism": "Intensely enhanced psychedelic effects", "notes": "Powerful but brief synergy."},
-            {"substance_a": "mdma", "substance_b": "2cb", "risk_level": "moderate", "mechanism": "Combined stimulant and psychedelic effects", "notes": "Intense experience with cardiovascular considerations."},
-            {"substance_a": "lsd", "substance_b": "2cb", "risk_level": "moderate", "mechanism": "Cross-tolerance and intensified visuals", "notes": "Psychologically intense."},
-            {"substance_a": "ketamine", "substance_b": "nitrous", "risk_level": "moderate", "mechanism": "Profound dissociation", "notes": "Risk of complete dissociation - sit or lie down."},
-            {"substance_a": "dxm", "substance_b": "cannabis", "risk_level": "moderate", "mechanism": "Intensified dissociation and confusion", "notes": "Can increase anxiety and nausea."},
-            {"substance_a": "caffeine", "substance_b": "alcohol", "risk_level": "moderate", "mechanism": "Masked intoxication", "notes": "Caffeine can mask alcohol effects leading to overconsumption."},
-            {"substance_a": "caffeine", "substance_b": "mdma", "risk_level": "moderate", "mechanism": "Increased cardiovascular strain", "notes": "Adds to heart rate and anxiety."},
-            {"substance_a": "pregabalin", "substance_b": "alcohol", "risk_level": "moderate", "mechanism": "Enhanced sedation", "notes": "Increased risk of respiratory depression."},
-            {"substance_a": "gabapentin", "substance_b": "alcohol", "risk_level": "moderate", "mechanism": "Enhanced sedation", "notes": "Increased intoxication and blackout risk."},
-            {"substance_a": "dph", "substance_b": "alcohol", "risk_level": "moderate", "mechanism": "Enhanced sedation and confusion", "notes": "Uncomfortable combination."},
-            
-            # ===== LOW RISK =====
-            # Psychedelic + dissociative (generally safe, intense experiences)
-            {"substance_a": "lsd", "substance_b": "ketamine", "risk_level": "low", "mechanism": "Minimal dangerous interaction", "notes": "Psychologically intense but not physically dangerous. Can be very disorienting."},
-            {"substance_a": "mushrooms", "substance_b": "ketamine", "risk_level": "low", "mechanism": "Minimal dangerous interaction", "notes": "Intense dissociative psychedelic experience."},
-            {"substance_a": "lsd", "substance_b": "dmt", "risk_level": "low", "mechanism": "Cross-tolerance", "notes": "DMT experience may be less intense if LSD already active."},
-            {"substance_a": "mushrooms", "substance_b": "dmt", "risk_level": "low", "mechanism": "Cross-tolerance", "notes": "Both tryptamines - some cross-tolerance."},
-            
-            # Popular combinations (candy/hippy flips)
-            {"substance_a": "lsd", "substance_b": "mdma", "risk_level": "low", "mechanism": "Enhanced empathogenic and psychedelic effects", "notes": "Popular 'candyflip' combination. Stay hydrated."},
-            {"substance_a": "mushrooms", "substance_b": "mdma", "risk_level": "low", "mechanism": "Enhanced effects", "notes": "Intense 'hippy flip' experience. Stay hydrated."},
-            
-            # Psychedelic + nitrous
-            {"substance_a": "mdma", "substance_b": "nitrous", "risk_level": "low", "mechanism": "Brief enhanced effects", "notes": "Popular combination but very brief."},
-            {"substance_a": "dmt", "substance_b": "nitrous", "risk_level": "low", "mechanism": "Intensely synergistic", "notes": "Extremely intense but brief."},
-            
-            # Cannabis combinations (generally low risk)
-            {"substance_a": "cannabis", "substance_b": "caffeine", "risk_level": "low", "mechanism": "Minimal interaction", "notes": "Generally safe but may increase anxiety in some."},
-            {"substance_a": "kratom", "substance_b": "cannabis", "risk_level": "low", "mechanism": "Minimal interaction", "notes": "Generally well tolerated combination."},
-            
-            # Benzodiazepines reducing psychedelic effects
-            {"substance_a": "lsd", "substance_b": "benzos", "risk_level": "low", "mechanism": "Benzos reduce psychedelic effects", "notes": "Benzos commonly used to end difficult trips."},
-            {"substance_a": "mushrooms", "substance_b": "benzos", "risk_level": "low", "mechanism": "Benzos reduce psychedelic effects", "notes": "Can help manage anxiety during trips."},
-            
-            # Cross-tolerances (psychedelics)
-            {"substance_a": "lsd", "substance_b": "mescaline", "risk_level": "low", "mechanism": "Cross-tolerance", "notes": "Both psychedelics - significant tolerance overlap."},
-            {"substance_a": "lsd", "substance_b": "2cb", "risk_level": "low", "mechanism": "Intensified visuals", "notes": "Psychologically intense but physically safe."},
-            
-            # SSRI interactions (reduces effects)
-            {"substance_a": "lsd", "substance_b": "ssri", "risk_level": "low", "mechanism": "SSRIs reduce psychedelic effects", "notes": "SSRIs significantly dampen LSD effects."},
-            {"substance_a": "mushrooms", "substance_b": "ssri", "risk_level": "low", "mechanism": "SSRIs reduce psychedelic effects", "notes": "SSRIs block psilocybin effects."},
-            {"substance_a": "dmt", "substance_b": "ssri", "risk_level": "low", "mechanism": "SSRIs may reduce effects", "notes": "SSRIs can dampen DMT experience."},
-        ]
-        await db.interactions.insert_many(interactions)
+        # One prune and unordered bulk_write per collection, all four in flight at once
+        await asyncio.gather(
+            seed_collection(db.substances, SEED_SUBSTANCES, ("id",)),
+            # Unsorted pairs from older seeds don't match a seed key, so they are pruned here too
+            seed_collection(db.interactions, SEED_INTERACTIONS, ("substance_a", "substance_b")),
+            seed_collection(db.harm_advice, SEED_HARM_ADVICE, ("context", "advice")),
+            seed_collection(db.symptoms, SEED_SYMPTOMS, ("name",))
+        )
         
-        # Seed harm reduction advice
-        harm_advice = [
-            {"context": "both", "advice": "Stay hydrated with water, but don't overdo it - sip regularly."},
-            {"context": "both", "advice": "Avoid mixing with additional substances."},
-            {"context": "both", "advice": "Stay with trusted people who can help if needed."},
-            {"context": "both", "advice": "Start with lower doses when combining substances."},
-            {"context": "planning", "advice": "Test your substances if possible using a test kit."},
-            {"context": "planning", "advice": "Plan for a safe environment and have emergency contacts ready."},
-            {"context": "already_taken", "advice": "Avoid redosing - wait to see the full effects."},
-            {"context": "already_taken", "advice": "Monitor your breathing and heart rate."},
-            {"context": "already_taken", "advice": "Find a cool, comfortable place to rest if feeling overwhelmed."}
-        ]
-        await db.harm_advice.insert_many(harm_advice)
+        # Pairs are now unique, so an index left non-unique by an older database can be upgraded
+        await create_pair_index()
         
-        # Seed symptoms
-        symptoms = [
-            {
-                "name": "Chest pain or pressure",
-                "severity": "emergency",
-                "description": "Severe chest pain, tightness, or pressure",
-                "action": "Seek immediate medical attention"
-            },
-            {
-                "name": "Difficulty breathing",
-                "severity": "emergency",
-                "description": "Struggling to breathe, gasping, or very slow breathing",
-                "action": "Call emergency services immediately"
-            },
-            {
-                "name": "Loss of consciousness",
-                "severity": "emergency",
-                "description": "Unable to wake person or keep them awake",
-                "action": "Call emergency services and place in recovery position"
-            },
-            {
-                "name": "Seizures",
-                "severity": "emergency",
-                "description": "Uncontrolled shaking or convulsions",
-                "action": "Protect from injury and call emergency services"
-            },
-            {
-                "name": "Severe confusion or agitation",
-                "severity": "serious",
-                "description": "Extreme confusion, paranoia, or aggressive behavior",
-                "action": "Move to calm environment; seek medical help if worsening"
-            },
-            {
-                "name": "Overheating",
-                "severity": "serious",
-                "description": "Very hot skin, confusion, rapid heartbeat",
-                "action": "Cool down immediately with water and air; seek medical attention"
-            },
-            {
-                "name": "Severe nausea or vomiting",
-                "severity": "monitor",
-                "description": "Persistent vomiting or inability to keep fluids down",
-                "action": "Rest, sip water slowly; seek help if continues for hours"
-            }
-        ]
-        await db.symptoms.insert_many(symptoms)
+        # New version first so the other workers reload, then rebuild this worker's tables
+        await db.meta.update_one({"_id": "seed"}, {"$set": {"version": uuid.uuid4().hex}}, upsert=True)
+        await load_lookup_tables()
         
-        return {"message": "Database seeded successfully", "counts": {
-            "substances": len(substances),
-            "interactions": len(interactions),
-            "harm_advice": len(harm_advice),
-            "symptoms": len(symptoms)
-        }}
+        return ORJSONResponse(content={"message": "Database seeded successfully", "counts": {
+            "substances": len(SEED_SUBSTANCES),
+            "interactions": len(SEED_INTERACTIONS),
+            "harm_advice": len(SEED_HARM_ADVICE),
+            "symptoms": len(SEED_SYMPTOMS)
+        }})
     except Exception as e:
         logger.error(f"Seed error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
-# Include router
-app.include_router(api_router)
-
+# No cookies or auth headers are used, so credentials stay off; browsers cache preflights for 10 minutes
 app.add_middleware(
     CORSMiddleware,
-    allow_credentials=True,
-    allow_origins=["*"],
+    allow_credentials=False,
+    allow_origins=[o.strip() for o in os.environ.get("CORS_ORIGINS", "*").split(",") if o.strip()],
     allow_methods=["*"],
     allow_headers=["*"],
+    max_age=600,
 )
 
+# Include router
+app.include_router(api_router)
+
+PAIR_INDEX_NAME = "substance_a_1_substance_b_1"
+INDEX_NOT_FOUND = 27  # MongoDB error code
+
+async def create_pair_index():
+    """Unique index on the sorted interaction pair (replaces the earlier non-unique one)"""
+    existing = (await db.interactions.index_information()).get(PAIR_INDEX_NAME)
+    if existing and existing.get("unique"):
+        return
+    try:
+        if existing:
+            try:
+                await db.interactions.drop_index(PAIR_INDEX_NAME)
+            except OperationFailure as e:
+                # Every worker runs this at startup; another one may have dropped it already
+                if e.code != INDEX_NOT_FOUND:
+                    raise
+        await db.interactions.create_index([("substance_a", 1), ("substance_b", 1)], unique=True)
+    except OperationFailure as e:
+        # Rows from before pairs were normalized can still collide; /seed-data prunes them and retries
+        logger.warning(f"Unique interaction pair index not created, run /seed-data to normalize: {e}")
+        try:
+            await db.interactions.create_index([("substance_a", 1), ("substance_b", 1)])
+        except OperationFailure as e:
+            # A concurrent worker won the race and created the unique index under the same name
+            logger.info(f"Interaction pair index already created by another worker: {e}")
+
+@app.on_event("startup")
+async def create_indexes():
+    """Ensure the indexes backing every lookup in this module exist"""
+    await asyncio.gather(
+        create_pair_index(),
+        db.substances.create_index("id", unique=True),
+        db.harm_advice.create_index("context"),
+        db.symptoms.create_index("severity"),
+        db.ai_cache.create_index("created_at", expireAfterSeconds=AI_CACHE_TTL)
+    )
+
+@app.on_event("startup")
+async def load_seed_data():
+    """Load the seeded dataset into memory before serving requests"""
+    await load_lookup_tables()
+
 @app.on_event("shutdown")
 async def shutdown_db_client():
     client.close()
@@ -4,39 +4,97 @@ SAFEUSE Backend API Testing Suite
 Tests all critical endpoints for the harm reduction drug interaction checker
 """
 
-import requests
+import argparse
+import asyncio
+import hashlib
+import httpx
 import json
+import orjson
 import time
 import sys
-from typing import Dict, List, Any
+from itertools import combinations
+from pathlib import Path
+from typing import Dict, List, Any, Optional
 
 # Backend URL from environment
 BACKEND_URL = "https://harmreduce-app.preview.emergentagent.com/api"
 
+# Status labels, indexed by a result's passed flag
+PASS_LABEL = "✅ PASS"
+FAIL_LABEL = "❌ FAIL"
+
+# Endpoint paths, relative to BACKEND_URL
+PATHS = {
+    "root": "/",
+    "seed": "/seed-data",
+    "substances": "/substances",
+    "symptoms": "/symptoms",
+    "check": "/check",
+    "check_batch": "/check/batch",
+    "check_stream": "/check/stream",
+}
+
+# Fields every item/body must carry
+SUBSTANCE_FIELDS = frozenset({"id", "name", "drug_class", "common_names"})
+SYMPTOM_FIELDS = frozenset({"name", "severity", "description", "action"})
+CHECK_FIELDS = frozenset({"risk_level", "risk_color", "explanation", "harm_advice", "substances"})
+# /check/stream sends these first, then the explanation on its own line
+STREAM_RESULT_FIELDS = CHECK_FIELDS - {"explanation"}
+
+# Gateway errors from the preview proxy are transient, so they are retried with exponential backoff
+RETRY_STATUSES = {502, 503, 504}
+MAX_RETRIES = 2
+RETRY_BACKOFF = 0.2
+
+# --use-cache stores raw responses here, keyed by request, so re-runs skip the network
+CACHE_DIR = Path(__file__).parent / ".cache"
+
+# Most /check calls in flight at once
+CHECK_CONCURRENCY = 8
+
+# Most checks per /check/batch request (the backend's limit)
+BATCH_SIZE = 20
+
+# Every risk level /check can return; generated cases accept any of them
+RISK_LEVELS = frozenset({"low", "moderate", "high", "avoid", "unknown"})
+
+# (test name, substance ids, expected risk, already taken); --all-pairs adds one case per substance pair
+INTERACTION_CASES = [
+    ("LOW Risk: LSD + Ketamine", ["lsd", "ketamine"], "low", False),
+    ("MODERATE Risk: Cannabis + Alcohol", ["cannabis", "alcohol"], "moderate", False),
+    ("HIGH Risk: MDMA + Alcohol", ["mdma", "alcohol"], "high", False),
+    ("AVOID Risk: Alcohol + Benzos", ["alcohol", "benzos"], "avoid", False),
+    # "already_taken" mode
+    ("Already Taken: MDMA + Alcohol", ["mdma", "alcohol"], "high", True),
+    # Edge cases
+    ("Three Substances: LSD + MDMA + Cannabis", ["lsd", "mdma", "cannabis"], "moderate", False),
+    ("Unknown Combination: LSD + Caffeine", ["lsd", "caffeine"], "unknown", False),
+]
+
+# (test name, substance ids) for selections request validation must reject with 422
+REJECTED_CASES = [
+    ("Single Substance: MDMA", ["mdma"]),
+    ("Unknown Substance: MDMA + Unobtainium", ["mdma", "unobtainium"]),
+]
+
 class SafeuseAPITester:
-    def __init__(self):
-        self.results = []
-        self.total_tests = 0
-        self.passed_tests = 0
-        self.failed_tests = 0
+    def __init__(self, use_cache: bool = False, reseed: bool = False, all_pairs: bool = False):
+        self.use_cache = use_cache
+        self.reseed = reseed
+        self.all_pairs = all_pairs
+        self.passed = []
+        self.failed = []
         
     def log_result(self, test_name: str, passed: bool, details: str = "", response_time: float = 0):
         """Log test result"""
-        self.total_tests += 1
-        if passed:
-            self.passed_tests += 1
-            status = "✅ PASS"
-        else:
-            self.failed_tests += 1
-            status = "❌ FAIL"
-            
+        status = (FAIL_LABEL, PASS_LABEL)[passed]
         result = {
             "test": test_name,
-            "status": status,
+            "passed": passed,
             "details": details,
             "response_time": f"{response_time:.3f}s" if response_time > 0 else "N/A"
         }
-        self.results.append(result)
+        (self.passed if passed else self.failed).append(result)
         print(f"{status} - {test_name}")
         if details:
             print(f"    Details: {details}")
@@ -44,37 +102,69 @@ class SafeuseAPITester:
             print(f"    Response time: {response_time:.3f}s")
         print()
 
-    def test_root_endpoint(self):
+    async def fetch(self, client: httpx.AsyncClient, method: str, url: str, timeout: float, cacheable: bool = True, **kwargs) -> tuple:
+        """Send a request (or replay it from the disk cache unless cacheable=False); returns (status, body)"""
+        if not self.use_cache or not cacheable:
+            return await self.send(client, method, url, timeout, **kwargs)
+        
+        key = hashlib.sha1(f"{method}{client.base_url}{url}{json.dumps(kwargs.get('json'), sort_keys=True)}".encode()).hexdigest()
+        cache_file = CACHE_DIR / f"{key}.json"
+        if cache_file.exists():
+            cached = json.loads(cache_file.read_text())
+            return cached["status"], cached["body"]
+        
+        status, body = await self.send(client, method, url, timeout, **kwargs)
+        # Server errors are never replayed
+        if status < 500:
+            CACHE_DIR.mkdir(exist_ok=True)
+            cache_file.write_text(json.dumps({"status": status, "body": body}))
+        return status, body
+
+    async def send(self, client: httpx.AsyncClient, method: str, url: str, timeout: float, **kwargs) -> tuple:
+        """Send a request over the shared client, retrying gateway errors; returns (status, body)"""
+        # Payloads are encoded with orjson rather than httpx's stdlib json
+        payload = kwargs.pop("json", None)
+        if payload is not None:
+            kwargs["content"] = orjson.dumps(payload)
+            kwargs["headers"] = {"Content-Type": "application/json"}
+        
+        for attempt in range(MAX_RETRIES + 1):
+            response = await client.request(method, url, timeout=timeout, **kwargs)
+            if response.status_code not in RETRY_STATUSES or attempt == MAX_RETRIES:
+                return response.status_code, response.text
+            await asyncio.sleep(RETRY_BACKOFF * 2 ** attempt)
+
+    async def test_root_endpoint(self, client: httpx.AsyncClient):
         """Test GET /api/ - Root endpoint"""
         try:
-            start_time = time.time()
-            response = requests.get(f"{BACKEND_URL}/", timeout=10)
-            response_time = time.time() - start_time
+            start_time = time.perf_counter()
+            status, body = await self.fetch(client, "GET", PATHS["root"], 10)
+            response_time = time.perf_counter() - start_time
             
-            if response.status_code == 200:
-                data = response.json()
+            if status == 200:
+                data = orjson.loads(body)
                 if "SAFEUSE API" in data.get("message", ""):
                     self.log_result("Root Endpoint", True, f"Message: {data['message']}", response_time)
                 else:
                     self.log_result("Root Endpoint", False, f"Unexpected message: {data}", response_time)
             else:
-                self.log_result("Root Endpoint", False, f"Status: {response.status_code}, Response: {response.text}", response_time)
+                self.log_result("Root Endpoint", False, f"Status: {status}, Response: {body}", response_time)
         except Exception as e:
             self.log_result("Root Endpoint", False, f"Exception: {str(e)}")
 
-    def test_seed_data(self):
+    async def test_seed_data(self, client: httpx.AsyncClient):
         """Test POST /api/seed-data - Database seeding"""
         try:
-            start_time = time.time()
-            response = requests.post(f"{BACKEND_URL}/seed-data", timeout=30)
-            response_time = time.time() - start_time
+            start_time = time.perf_counter()
+            status, body = await self.fetch(client, "POST", PATHS["seed"], 30, cacheable=False)
+            response_time = time.perf_counter() - start_time
             
-            if response.status_code == 200:
-                data = response.json()
+            if status == 200:
+                data = orjson.loads(body)
                 counts = data.get("counts", {})
                 expected_counts = {
                     "substances": 33,
-                    "interactions": 93,
+                    "interactions": 73,
                     "harm_advice": 9,
                     "symptoms": 7
                 }
@@ -91,71 +181,139 @@ class SafeuseAPITester:
                 
                 self.log_result("Database Seeding", all_correct, "; ".join(details), response_time)
             else:
-                self.log_result("Database Seeding", False, f"Status: {response.status_code}, Response: {response.text}", response_time)
+                self.log_result("Database Seeding", False, f"Status: {status}, Response: {body}", response_time)
         except Exception as e:
             self.log_result("Database Seeding", False, f"Exception: {str(e)}")
 
-    def test_get_substances(self):
-        """Test GET /api/substances - Get all substances"""
+    async def probe_seeded(self, client: httpx.AsyncClient) -> bool:
+        """Log a PASS for seeding and return True if /substances already lists the full library"""
         try:
-            start_time = time.time()
-            response = requests.get(f"{BACKEND_URL}/substances", timeout=10)
-            response_time = time.time() - start_time
+            start_time = time.perf_counter()
+            # Whether the server is seeded is live state; a cached body can't answer it
+            status, body = await self.fetch(client, "GET", PATHS["substances"], 10, cacheable=False)
+            response_time = time.perf_counter() - start_time
+            if status == 200 and len(orjson.loads(body)) == 33:
+                self.log_result("Database Seeding", True, "Already seeded (33 substances); skipped /seed-data", response_time)
+                return True
+        except Exception:
+            pass
+        return False
+
+    async def verify_list(self, client: httpx.AsyncClient, name: str, path: str, fields: frozenset, expected_count: int) -> Optional[List[dict]]:
+        """GET a seeded list and check its item fields and length (returned when the list passes)"""
+        noun = name.removeprefix("Get ").lower()
+        try:
+            start_time = time.perf_counter()
+            status, body = await self.fetch(client, "GET", path, 10)
+            response_time = time.perf_counter() - start_time
             
-            if response.status_code == 200:
-                substances = response.json()
-                if len(substances) == 33:
-                    # Check structure of first substance
-                    if substances:
-                        first_substance = substances[0]
-                        required_fields = ["id", "name", "drug_class", "common_names"]
-                        has_all_fields = all(field in first_substance for field in required_fields)
-                        
-                        if has_all_fields:
-                            self.log_result("Get Substances", True, f"Found {len(substances)} substances with correct structure", response_time)
-                        else:
-                            missing = [f for f in required_fields if f not in first_substance]
-                            self.log_result("Get Substances", False, f"Missing fields: {missing}", response_time)
-                    else:
-                        self.log_result("Get Substances", False, "Empty substances list", response_time)
+            if status == 200:
+                items = orjson.loads(body)
+                # Shape of the first item is checked before the count, so a schema change fails fast and clearly
+                if not items:
+                    self.log_result(name, False, f"Empty {noun} list", response_time)
+                    return
+                
+                first_item = items[0]
+                if not fields.issubset(first_item):
+                    missing = sorted(fields.difference(first_item))
+                    self.log_result(name, False, f"Missing fields: {missing}", response_time)
+                elif len(items) != expected_count:
+                    self.log_result(name, False, f"Expected {expected_count} {noun}, got {len(items)}", response_time)
                 else:
-                    self.log_result("Get Substances", False, f"Expected 33 substances, got {len(substances)}", response_time)
+                    self.log_result(name, True, f"Found {len(items)} {noun} with correct structure", response_time)
+                    return items
             else:
-                self.log_result("Get Substances", False, f"Status: {response.status_code}, Response: {response.text}", response_time)
+                self.log_result(name, False, f"Status: {status}, Response: {body}", response_time)
         except Exception as e:
-            self.log_result("Get Substances", False, f"Exception: {str(e)}")
+            self.log_result(name, False, f"Exception: {str(e)}")
 
-    def test_get_symptoms(self):
-        """Test GET /api/symptoms - Get emergency symptoms"""
+    async def test_get_substances(self, client: httpx.AsyncClient) -> Optional[List[dict]]:
+        """Test GET /api/substances - Get all substances (returned when the list passes)"""
+        return await self.verify_list(client, "Get Substances", PATHS["substances"], SUBSTANCE_FIELDS, 33)
+
+    async def test_conditional_get(self, client: httpx.AsyncClient):
+        """Test GET /api/substances - ETag/Cache-Control headers and 304 for strong and weak If-None-Match"""
         try:
-            start_time = time.time()
-            response = requests.get(f"{BACKEND_URL}/symptoms", timeout=10)
-            response_time = time.time() - start_time
+            # Straight to the server: --use-cache stores bodies, not headers, and 304s only mean something live
+            start_time = time.perf_counter()
+            response = await client.get(PATHS["substances"], timeout=10)
+            response_time = time.perf_counter() - start_time
             
-            if response.status_code == 200:
-                symptoms = response.json()
-                if len(symptoms) == 7:
-                    # Check structure
-                    if symptoms:
-                        first_symptom = symptoms[0]
-                        required_fields = ["name", "severity", "description", "action"]
-                        has_all_fields = all(field in first_symptom for field in required_fields)
-                        
-                        if has_all_fields:
-                            self.log_result("Get Symptoms", True, f"Found {len(symptoms)} symptoms with correct structure", response_time)
-                        else:
-                            missing = [f for f in required_fields if f not in first_symptom]
-                            self.log_result("Get Symptoms", False, f"Missing fields: {missing}", response_time)
-                    else:
-                        self.log_result("Get Symptoms", False, "Empty symptoms list", response_time)
+            etag = response.headers.get("ETag")
+            cache_control = response.headers.get("Cache-Control", "")
+            if response.status_code != 200 or not etag or "max-age" not in cache_control:
+                self.log_result("Conditional GET", False, f"Status: {response.status_code}, ETag: {etag}, Cache-Control: {cache_control!r}", response_time)
+                return
+            
+            # Proxies that gzip the body hand clients a weak W/"..." tag, which must still match
+            details = [f"ETag: {etag} ✓"]
+            passed = True
+            for label, tag in (("strong", etag), ("weak", "W/" + etag.removeprefix("W/"))):
+                revalidated = await client.get(PATHS["substances"], headers={"If-None-Match": tag}, timeout=10)
+                if revalidated.status_code == 304:
+                    details.append(f"{label} If-None-Match: 304 ✓")
                 else:
-                    self.log_result("Get Symptoms", False, f"Expected 7 symptoms, got {len(symptoms)}", response_time)
-            else:
-                self.log_result("Get Symptoms", False, f"Status: {response.status_code}, Response: {response.text}", response_time)
+                    details.append(f"{label} If-None-Match: {revalidated.status_code} (expected 304) ✗")
+                    passed = False
+            
+            self.log_result("Conditional GET", passed, "; ".join(details), response_time)
         except Exception as e:
-            self.log_result("Get Symptoms", False, f"Exception: {str(e)}")
+            self.log_result("Conditional GET", False, f"Exception: {str(e)}")
+
+    async def test_get_symptoms(self, client: httpx.AsyncClient):
+        """Test GET /api/symptoms - Get emergency symptoms"""
+        await self.verify_list(client, "Get Symptoms", PATHS["symptoms"], SYMPTOM_FIELDS, 7)
 
-    def test_interaction_check(self, test_name: str, substance_ids: List[str], expected_risk: str, already_taken: bool = False):
+    def verify_check_result(self, test_name: str, data: Dict[str, Any], expected_risk: Optional[str], response_time: float):
+        """Check one /check result body against the expected risk (any known level when None) and log it"""
+        # Check all required fields exist
+        if not CHECK_FIELDS.issubset(data):
+            missing_fields = sorted(CHECK_FIELDS.difference(data))
+            self.log_result(test_name, False, f"Missing fields: {missing_fields}", response_time)
+            return
+        
+        # Check risk level matches expected
+        actual_risk = data["risk_level"].lower()
+        if expected_risk is None:
+            risk_match = actual_risk in RISK_LEVELS
+            risk_details = f"Risk: {actual_risk} ✓" if risk_match else f"Risk: {actual_risk} (not a known level) ✗"
+        elif actual_risk == expected_risk.lower():
+            risk_match = True
+            risk_details = f"Risk: {actual_risk} ✓"
+        else:
+            risk_match = False
+            risk_details = f"Risk: {actual_risk} (expected {expected_risk}) ✗"
+        
+        # Check AI explanation quality
+        explanation = data["explanation"]
+        has_explanation = len(explanation) > 20 and not explanation.startswith("Unable to generate")
+        
+        # Check harm advice
+        harm_advice = data["harm_advice"]
+        has_advice = isinstance(harm_advice, list) and len(harm_advice) > 0
+        
+        # Check emergency symptoms for high/avoid risk
+        emergency_symptoms = data.get("emergency_symptoms")
+        if (expected_risk or actual_risk).lower() in ["high", "avoid"]:
+            has_emergency_info = emergency_symptoms is not None and len(emergency_symptoms) > 0
+            emergency_details = "Emergency symptoms: ✓" if has_emergency_info else "Emergency symptoms: ✗"
+        else:
+            has_emergency_info = True  # Not required for low/moderate
+            emergency_details = "Emergency symptoms: N/A (not required)"
+        
+        # Overall success
+        success = risk_match and has_explanation and has_advice and has_emergency_info
+        
+        details = f"{risk_details}; AI explanation: {'✓' if has_explanation else '✗'}; Harm advice: {'✓' if has_advice else '✗'}; {emergency_details}"
+        
+        self.log_result(test_name, success, details, response_time)
+        
+        # Log AI explanation quality for review
+        if has_explanation:
+            print(f"    AI Explanation: {explanation[:100]}...")
+
+    async def test_interaction_check(self, client: httpx.AsyncClient, test_name: str, substance_ids: List[str], expected_risk: Optional[str], already_taken: bool = False):
         """Test POST /api/check - Drug interaction checking"""
         try:
             payload = {
@@ -163,147 +321,193 @@ class SafeuseAPITester:
                 "already_taken": already_taken
             }
             
-            start_time = time.time()
-            response = requests.post(f"{BACKEND_URL}/check", json=payload, timeout=15)
-            response_time = time.time() - start_time
+            start_time = time.perf_counter()
+            status, body = await self.fetch(client, "POST", PATHS["check"], 15, json=payload)
+            response_time = time.perf_counter() - start_time
             
-            if response.status_code == 200:
-                data = response.json()
-                required_fields = ["risk_level", "risk_color", "explanation", "harm_advice", "substances"]
-                
-                # Check all required fields exist
-                missing_fields = [f for f in required_fields if f not in data]
-                if missing_fields:
-                    self.log_result(test_name, False, f"Missing fields: {missing_fields}", response_time)
-                    return
-                
-                # Check risk level matches expected
-                actual_risk = data["risk_level"].lower()
-                if actual_risk == expected_risk.lower():
-                    risk_match = True
-                    risk_details = f"Risk: {actual_risk} ✓"
-                else:
-                    risk_match = False
-                    risk_details = f"Risk: {actual_risk} (expected {expected_risk}) ✗"
-                
-                # Check AI explanation quality
-                explanation = data["explanation"]
-                has_explanation = len(explanation) > 20 and not explanation.startswith("Unable to generate")
-                
-                # Check harm advice
-                harm_advice = data["harm_advice"]
-                has_advice = isinstance(harm_advice, list) and len(harm_advice) > 0
-                
-                # Check emergency symptoms for high/avoid risk
-                emergency_symptoms = data.get("emergency_symptoms")
-                if expected_risk.lower() in ["high", "avoid"]:
-                    has_emergency_info = emergency_symptoms is not None and len(emergency_symptoms) > 0
-                    emergency_details = "Emergency symptoms: ✓" if has_emergency_info else "Emergency symptoms: ✗"
-                else:
-                    has_emergency_info = True  # Not required for low/moderate
-                    emergency_details = "Emergency symptoms: N/A (not required)"
-                
-                # Overall success
-                success = risk_match and has_explanation and has_advice and has_emergency_info
-                
-                details = f"{risk_details}; AI explanation: {'✓' if has_explanation else '✗'}; Harm advice: {'✓' if has_advice else '✗'}; {emergency_details}"
-                
-                self.log_result(test_name, success, details, response_time)
-                
-                # Log AI explanation quality for review
-                if has_explanation:
-                    print(f"    AI Explanation: {explanation[:100]}...")
-                
+            if status == 200:
+                self.verify_check_result(test_name, orjson.loads(body), expected_risk, response_time)
+            else:
+                self.log_result(test_name, False, f"Status: {status}, Response: {body}", response_time)
+        except Exception as e:
+            self.log_result(test_name, False, f"Exception: {str(e)}")
+
+    async def test_interaction_checks_batched(self, client: httpx.AsyncClient, cases: List[tuple]) -> bool:
+        """Test POST /api/check/batch - All cases in one request; False if the backend has no batch support"""
+        try:
+            payload = {
+                "batch": [{"substance_ids": substance_ids, "already_taken": already_taken} for _, substance_ids, _, already_taken in cases]
+            }
+            
+            start_time = time.perf_counter()
+            status, body = await self.fetch(client, "POST", PATHS["check_batch"], 30, json=payload)
+            response_time = time.perf_counter() - start_time
+            
+            # Only a missing route means an older backend; a 422 is this backend's own batch validation failing
+            if status in (404, 405):
+                print(f"ℹ️  /check/batch unavailable (status {status}); checking cases one by one")
+                return False
+            
+            if status == 200:
+                results = orjson.loads(body)
+                if len(results) != len(cases):
+                    for test_name, *_ in cases:
+                        self.log_result(test_name, False, f"Batch returned {len(results)} results for {len(cases)} cases", response_time)
+                    return True
+                # Each case reports the shared batch round-trip time
+                for (test_name, _, expected_risk, _), data in zip(cases, results):
+                    self.verify_check_result(test_name, data, expected_risk, response_time)
+            else:
+                for test_name, *_ in cases:
+                    self.log_result(test_name, False, f"Batch status: {status}, Response: {body}", response_time)
+        except Exception as e:
+            for test_name, *_ in cases:
+                self.log_result(test_name, False, f"Batch exception: {str(e)}")
+        return True
+
+    async def test_check_stream(self, client: httpx.AsyncClient, test_name: str, substance_ids: List[str], expected_risk: str):
+        """Test POST /api/check/stream - NDJSON result line, then explanation line"""
+        try:
+            payload = {"substance_ids": substance_ids, "already_taken": False}
+            
+            start_time = time.perf_counter()
+            status, body = await self.fetch(client, "POST", PATHS["check_stream"], 15, json=payload)
+            response_time = time.perf_counter() - start_time
+            
+            if status != 200:
+                self.log_result(test_name, False, f"Status: {status}, Response: {body}", response_time)
+                return
+            
+            lines = [orjson.loads(line) for line in body.splitlines() if line.strip()]
+            if len(lines) != 2:
+                self.log_result(test_name, False, f"Expected 2 NDJSON lines, got {len(lines)}", response_time)
+                return
+            
+            result, explanation = lines
+            if not STREAM_RESULT_FIELDS.issubset(result) or "explanation" in result:
+                self.log_result(test_name, False, f"First line fields: {sorted(result)} (expected {sorted(STREAM_RESULT_FIELDS)})", response_time)
+            elif set(explanation) != {"explanation"} or len(explanation["explanation"]) <= 20:
+                self.log_result(test_name, False, f"Second line: {explanation}", response_time)
+            elif result["risk_level"] != expected_risk:
+                self.log_result(test_name, False, f"Risk: {result['risk_level']} (expected {expected_risk}) ✗", response_time)
+            else:
+                self.log_result(test_name, True, f"Risk: {result['risk_level']} ✓; result line then explanation line ✓", response_time)
+        except Exception as e:
+            self.log_result(test_name, False, f"Exception: {str(e)}")
+
+    async def test_rejected_check(self, client: httpx.AsyncClient, test_name: str, substance_ids: List[str]):
+        """Test POST /api/check - Invalid selections are rejected before any lookup"""
+        try:
+            payload = {"substance_ids": substance_ids, "already_taken": False}
+            
+            start_time = time.perf_counter()
+            status, body = await self.fetch(client, "POST", PATHS["check"], 15, json=payload)
+            response_time = time.perf_counter() - start_time
+            
+            if status == 422:
+                self.log_result(test_name, True, "Rejected with 422 ✓", response_time)
             else:
-                self.log_result(test_name, False, f"Status: {response.status_code}, Response: {response.text}", response_time)
+                self.log_result(test_name, False, f"Expected 422, got {status}: {body}", response_time)
         except Exception as e:
             self.log_result(test_name, False, f"Exception: {str(e)}")
 
-    def run_all_tests(self):
+    async def run_all_tests(self):
         """Run comprehensive test suite"""
         print("🧪 SAFEUSE Backend API Testing Suite")
         print("=" * 50)
         print()
         
-        # Test 1: Root endpoint
-        self.test_root_endpoint()
-        
-        # Test 2: Database seeding
-        self.test_seed_data()
-        
-        # Test 3: Get substances
-        self.test_get_substances()
-        
-        # Test 4: Get symptoms  
-        self.test_get_symptoms()
-        
-        # Test 5-9: Interaction checks with different risk levels
-        print("🔍 Testing Drug Interaction Checks:")
-        print("-" * 30)
-        
-        # LOW risk: LSD + Ketamine
-        self.test_interaction_check("LOW Risk: LSD + Ketamine", ["lsd", "ketamine"], "low")
-        
-        # MODERATE risk: Cannabis + Alcohol
-        self.test_interaction_check("MODERATE Risk: Cannabis + Alcohol", ["cannabis", "alcohol"], "moderate")
-        
-        # HIGH risk: MDMA + Alcohol
-        self.test_interaction_check("HIGH Risk: MDMA + Alcohol", ["mdma", "alcohol"], "high")
-        
-        # AVOID risk: Alcohol + Benzodiazepines
-        self.test_interaction_check("AVOID Risk: Alcohol + Benzos", ["alcohol", "benzos"], "avoid")
-        
-        # Test "already_taken" mode
-        self.test_interaction_check("Already Taken: MDMA + Alcohol", ["mdma", "alcohol"], "high", already_taken=True)
-        
-        # Edge cases
-        print("🔍 Testing Edge Cases:")
-        print("-" * 20)
-        
-        # Single substance
-        self.test_interaction_check("Single Substance: MDMA", ["mdma"], "unknown")
-        
-        # Three substances
-        self.test_interaction_check("Three Substances: LSD + MDMA + Cannabis", ["lsd", "mdma", "cannabis"], "moderate")
-        
-        # Unknown combination
-        self.test_interaction_check("Unknown Combination: LSD + Caffeine", ["lsd", "caffeine"], "unknown")
+        # One HTTP/2 client for the whole run: concurrent tests multiplex as streams over a single connection
+        limits = httpx.Limits(max_connections=20, keepalive_expiry=30)
+        async with httpx.AsyncClient(http2=True, base_url=BACKEND_URL, timeout=15.0, limits=limits) as client:
+            # Untimed warm-up so DNS, the TLS handshake and any preview cold start don't land on the first timed
+            # test; any status will do (the API has no HEAD routes). Cached runs still reach the server for the
+            # seed probe, conditional GETs and uncached calls, so they warm up too
+            try:
+                await client.head(PATHS["root"], timeout=5)
+            except httpx.HTTPError:
+                pass
+            
+            # Seeding first: every other test reads the seeded data (skipped when the library is already there)
+            if self.reseed or not await self.probe_seeded(client):
+                await self.test_seed_data(client)
+            
+            # Results are logged as each test completes; /check calls are capped so bursts don't trip rate limits
+            print("🔍 Testing Endpoints, Drug Interaction Checks and Edge Cases:")
+            print("-" * 30)
+            check_limit = asyncio.Semaphore(CHECK_CONCURRENCY)
+            
+            async def bounded(check):
+                async with check_limit:
+                    await check
+            
+            async def check_batch(cases):
+                # One round-trip for the batch, or one bounded /check per case if batching isn't supported;
+                # the batch releases its slot before falling back so the per-case checks can't starve
+                async with check_limit:
+                    batched = await self.test_interaction_checks_batched(client, cases)
+                if not batched:
+                    await asyncio.gather(*(bounded(self.test_interaction_check(client, *case)) for case in cases))
+            
+            async def interaction_checks(cases):
+                await asyncio.gather(*(check_batch(cases[i:i + BATCH_SIZE]) for i in range(0, len(cases), BATCH_SIZE)))
+            
+            async def substance_checks():
+                substances = await self.test_get_substances(client)
+                if self.all_pairs and substances:
+                    ids = [s["id"] for s in substances]
+                    await interaction_checks([(f"Pair: {a} + {b}", [a, b], None, False) for a, b in combinations(ids, 2)])
+            
+            await asyncio.gather(
+                self.test_root_endpoint(client),
+                substance_checks(),
+                self.test_conditional_get(client),
+                self.test_get_symptoms(client),
+                interaction_checks(INTERACTION_CASES),
+                bounded(self.test_check_stream(client, "Stream: MDMA + Alcohol", ["mdma", "alcohol"], "high")),
+                *(bounded(self.test_rejected_check(client, *case)) for case in REJECTED_CASES)
+            )
 
     def print_summary(self):
         """Print test summary"""
         print("\n" + "=" * 50)
         print("📊 TEST SUMMARY")
         print("=" * 50)
-        print(f"Total Tests: {self.total_tests}")
-        print(f"Passed: {self.passed_tests} ✅")
-        print(f"Failed: {self.failed_tests} ❌")
-        print(f"Success Rate: {(self.passed_tests/self.total_tests*100):.1f}%")
+        total_tests = len(self.passed) + len(self.failed)
+        print(f"Total Tests: {total_tests}")
+        print(f"Passed: {len(self.passed)} ✅")
+        print(f"Failed: {len(self.failed)} ❌")
+        print(f"Success Rate: {(len(self.passed)/total_tests*100):.1f}%")
         print()
         
-        if self.failed_tests > 0:
+        if self.failed:
             print("❌ FAILED TESTS:")
             print("-" * 20)
-            for result in self.results:
-                if "❌" in result["status"]:
-                    print(f"• {result['test']}: {result['details']}")
+            for result in self.failed:
+                print(f"• {result['test']}: {result['details']}")
             print()
         
         print("✅ PASSED TESTS:")
         print("-" * 20)
-        for result in self.results:
-            if "✅" in result["status"]:
-                print(f"• {result['test']}")
+        for result in self.passed:
+            print(f"• {result['test']}")
         
-        return self.failed_tests == 0
+        return not self.failed
 
 if __name__ == "__main__":
-    tester = SafeuseAPITester()
-    tester.run_all_tests()
+    parser = argparse.ArgumentParser(description="SAFEUSE backend API tests")
+    parser.add_argument("--use-cache", action="store_true", help=f"replay responses cached under {CACHE_DIR}, fetching only misses")
+    parser.add_argument("--reseed", action="store_true", help="always call /seed-data, even if the library is already seeded")
+    parser.add_argument("--all-pairs", action="store_true", help="also check every pair of substances from /substances (shape only)")
+    args = parser.parse_args()
+    
+    tester = SafeuseAPITester(use_cache=args.use_cache, reseed=args.reseed, all_pairs=args.all_pairs)
+    asyncio.run(tester.run_all_tests())
     success = tester.print_summary()
     
     if success:
         print("\n🎉 All tests passed! Backend is working correctly.")
         sys.exit(0)
     else:
-        print(f"\n⚠️  {tester.failed_tests} test(s) failed. Check the details above.")
+        print(f"\n⚠️  {len(tester.failed)} test(s) failed. Check the details above.")
         sys.exit(1)
\ No newline at end of file